@@ -0,0 +1,182 @@
+import atexit
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+
+# Runs are kept in a local SQLite file next to the app so they survive restarts.
+DB_FILE = Path(__file__).parent / "experiments.sqlite"
+
+# Runs are buffered in memory and written together once this many are waiting (or the buffer gets old).
+FLUSH_BATCH_SIZE = 25
+FLUSH_INTERVAL_SECONDS = 5.0
+
+RUN_COLUMNS = [
+    "run_key", "created_at", "dataset_name", "dataset_fingerprint", "target", "problem_type", "model",
+    "features", "params", "metrics", "score", "fit_seconds", "predict_seconds", "train_rows", "test_rows"
+]
+
+# Timings describe the fit that first produced a run. Reruns of the same run (for example a widget change that
+# reuses a cached model) update its metrics but keep these.
+FIRST_RUN_COLUMNS = ["fit_seconds", "predict_seconds"]
+
+_buffer = []
+_last_flush = time.monotonic()
+_lock = threading.Lock()
+
+
+def connect():
+    connection = sqlite3.connect(DB_FILE, timeout=30)
+    # WAL lets the runs page read while the Predictions page writes.
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_key TEXT NOT NULL UNIQUE,
+            created_at TEXT NOT NULL,
+            dataset_name TEXT,
+            dataset_fingerprint TEXT NOT NULL,
+            target TEXT NOT NULL,
+            problem_type TEXT NOT NULL,
+            model TEXT NOT NULL,
+            features TEXT NOT NULL,
+            params TEXT NOT NULL,
+            metrics TEXT NOT NULL,
+            score REAL,
+            fit_seconds REAL,
+            predict_seconds REAL,
+            train_rows INTEGER,
+            test_rows INTEGER
+        )""")
+    # Indexes cover the lookups the runs page makes, so filtering stays fast with many thousands of runs.
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_runs_dataset_target ON runs (dataset_fingerprint, target)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_runs_model ON runs (model)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_runs_created ON runs (created_at)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_runs_score ON runs (problem_type, score)")
+    return connection
+
+
+def make_run(dataset_name, dataset_fingerprint, target, problem_type, model, features, params, metrics,
+             fit_seconds, predict_seconds, train_rows, test_rows):
+    # The main score is stored in its own column so runs can be sorted by it in SQL.
+    score = metrics.get("Accuracy", metrics.get("R²"))
+    features = sorted(str(feature) for feature in features)
+    params = {key: params[key] for key in sorted(params)}
+
+    # The same model, settings, and data produce the same key, so repeated reruns update one record.
+    run_key = hashlib.sha1(json.dumps(
+        [dataset_fingerprint, target, problem_type, model, features, params], default=str).encode("utf-8")).hexdigest()
+
+    return {
+        "run_key": run_key,
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "dataset_name": dataset_name,
+        "dataset_fingerprint": dataset_fingerprint,
+        "target": target,
+        "problem_type": problem_type,
+        "model": model,
+        "features": json.dumps(features),
+        "params": json.dumps(params, default=str),
+        "metrics": json.dumps({key: float(value) for key, value in metrics.items()}),
+        "score": None if score is None else float(score),
+        "fit_seconds": fit_seconds,
+        "predict_seconds": predict_seconds,
+        "train_rows": int(train_rows),
+        "test_rows": int(test_rows)
+    }
+
+
+def save_run(run):
+    # Writes are batched: the run waits in memory until the batch is full or old enough.
+    with _lock:
+        _buffer.append(run)
+        due = len(_buffer) >= FLUSH_BATCH_SIZE or time.monotonic() - _last_flush >= FLUSH_INTERVAL_SECONDS
+    if due:
+        flush()
+
+
+def flush():
+    global _last_flush
+    with _lock:
+        pending = _buffer[:]
+        _buffer.clear()
+        _last_flush = time.monotonic()
+    if not pending:
+        return
+
+    placeholders = ", ".join("?" for _ in RUN_COLUMNS)
+    updates = ", ".join(
+        f"{col} = excluded.{col}" for col in RUN_COLUMNS if col != "run_key" and col not in FIRST_RUN_COLUMNS)
+    try:
+        connection = connect()
+        try:
+            # One transaction and one executemany for the whole batch.
+            with connection:
+                connection.executemany(
+                    f"INSERT INTO runs ({', '.join(RUN_COLUMNS)}) VALUES ({placeholders}) "
+                    f"ON CONFLICT(run_key) DO UPDATE SET {updates}",
+                    [[run[col] for col in RUN_COLUMNS] for run in pending]
+                )
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        # The batch goes back to the front of the buffer so the next flush retries it instead of losing it.
+        with _lock:
+            _buffer[:0] = pending
+        raise
+
+
+# Anything still buffered is written when the app shuts down.
+atexit.register(flush)
+
+
+def load_runs(dataset_fingerprint=None, target=None, models=None, order_by="created_at", descending=True, limit=500):
+    # Pending runs are written first so the results include the latest training runs.
+    flush()
+
+    conditions, values = [], []
+    if dataset_fingerprint is not None:
+        conditions.append("dataset_fingerprint = ?")
+        values.append(dataset_fingerprint)
+    if target is not None:
+        conditions.append("target = ?")
+        values.append(target)
+    if models:
+        conditions.append(f"model IN ({', '.join('?' for _ in models)})")
+        values.extend(models)
+
+    # Only known column names can be used for sorting, so the ORDER BY clause is safe to build.
+    if order_by not in RUN_COLUMNS + ["id"]:
+        order_by = "created_at"
+
+    query = "SELECT id, " + ", ".join(RUN_COLUMNS) + " FROM runs"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += f" ORDER BY {order_by} {'DESC' if descending else 'ASC'} LIMIT ?"
+    values.append(int(limit))
+
+    connection = connect()
+    try:
+        return pd.read_sql_query(query, connection, params=values)
+    finally:
+        connection.close()
+
+
+def load_filter_options():
+    # Distinct values for the filter widgets on the runs page.
+    flush()
+    connection = connect()
+    try:
+        return pd.read_sql_query(
+            "SELECT dataset_name, dataset_fingerprint, target, model, COUNT(*) AS runs FROM runs "
+            "GROUP BY dataset_fingerprint, target, model",
+            connection
+        )
+    finally:
+        connection.close()
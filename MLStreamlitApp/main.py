@@ -8,7 +8,7 @@ st.title("Machine Learning App 🧠")
 
 # Quick welcome text so users know how to begin.
 st.markdown("### Welcome 👋")
-st.write("Use the sidebar to navigate between pages for data cleaning and predictions.")
+st.write("Use the sidebar to navigate between pages for data cleaning, predictions, and saved experiment runs.")
 
 # Short overview of the pages inside the app.
 st.markdown("### 📂 Available Pages")
@@ -19,6 +19,9 @@ st.markdown("""
 
 - **📈 Predictions**  
   Utilize different machine learning algorithms to make predictions using your data.
+
+- **🗂️ Experiment Runs**  
+  Sort, filter, and compare every model you have trained on the Predictions page.
 """)
 
 # Friendly reminder about the recommended workflow.
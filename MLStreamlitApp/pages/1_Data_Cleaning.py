@@ -1,3 +1,5 @@
+import uuid
+
 import pandas as pd
 import streamlit as st
 
@@ -66,6 +68,9 @@ if dataframe is not None:
         st.session_state["dataset_name"] = dataset_name
         st.session_state["original_df"] = dataframe.copy()
         st.session_state["working_df"] = dataframe.copy()
+        # data_version changes whenever the working data changes, so other pages can key their caches on it.
+        # Caches are shared by every session, so the version is a random id rather than a per-session counter.
+        st.session_state["data_version"] = uuid.uuid4().hex
 
     # original_df stays untouched so the user can reset back to it.
     # working_df is the version that changes as cleaning steps are applied.
@@ -206,6 +211,7 @@ if dataframe is not None:
             # Save the cleaned dataframe so the changes persist across reruns/pages.
             st.session_state["working_df"] = updated_df
             st.session_state["dataframe"] = updated_df
+            st.session_state["data_version"] = uuid.uuid4().hex
             st.rerun()
 
     with button_col2:
@@ -213,6 +219,7 @@ if dataframe is not None:
             # Restore the untouched original dataframe.
             st.session_state["working_df"] = original_df.copy()
             st.session_state["dataframe"] = original_df.copy()
+            st.session_state["data_version"] = uuid.uuid4().hex
             st.rerun()
 
     # Final preview of the current cleaned dataframe.
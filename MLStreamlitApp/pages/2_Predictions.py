@@ -1,18 +1,62 @@
+import copy
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 import streamlit as st
 import matplotlib.pyplot as plt
-from pandas.api.types import is_numeric_dtype
-from sklearn.linear_model import LinearRegression, LogisticRegression
-from sklearn.metrics import accuracy_score, confusion_matrix, ConfusionMatrixDisplay, f1_score, mean_squared_error, precision_score, recall_score, roc_auc_score, roc_curve, root_mean_squared_error, r2_score
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+from scipy import stats
+from sklearn.base import clone
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.linear_model import ElasticNet, Lasso, LinearRegression, LogisticRegression, Ridge, enet_path
+from sklearn.metrics import accuracy_score, confusion_matrix, ConfusionMatrixDisplay, roc_auc_score, roc_curve, r2_score
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.tree import DecisionTreeClassifier
-from xgboost import XGBClassifier
+from sklearn.preprocessing import LabelEncoder
+from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
+from xgboost import DMatrix, XGBClassifier
+
+from experiment_store import make_run, save_run
+from pipeline import build_preprocessor, classification_metrics, dataset_fingerprint, detect_problem_type, regression_metrics
 
 
 # Configure the Predictions page.
 st.set_page_config(page_title="Predictions", page_icon="📈", layout="wide")
 
+# Regularized regression models and the penalty each one uses along its path.
+REGULARIZED_MODELS = {
+    "Ridge Regression": "ridge",
+    "Lasso Regression": "lasso",
+    "ElasticNet Regression": "elasticnet"
+}
+# Number of penalty strengths evaluated along each regularization path.
+PATH_ALPHAS = 60
+
+# Deepest tree grown for the decision tree depth sweep (also the max of the depth slider).
+TREE_MAX_DEPTH = 15
+
+# Logarithmic grid of C values for the logistic regression sweep (C = 1 is the sklearn default, at index 12).
+C_GRID = np.logspace(-3, 3, 25)
+
+# Shares of the training rows used by the progressive training stages (the last stage is the full fit).
+PROGRESSIVE_FRACTIONS = (0.05, 0.2, 0.5, 1.0)
+
+# Feature screening scores this many candidate columns at a time, and bins numeric values into this many quantiles.
+SCREENING_CHUNK_COLUMNS = 200
+SCREENING_BINS = 10
+
+# Bootstrap settings used to put a confidence interval around every reported metric.
+BOOTSTRAP_RESAMPLES = 2000
+CONFIDENCE_LEVEL = 0.95
+# Upper bound on resample-matrix cells held in memory at once (resamples x test rows).
+BOOTSTRAP_MAX_CELLS = 5_000_000
+
 
 # -----------------------------------------------------------------------------
 # Helper functions
@@ -20,7 +64,7 @@ st.set_page_config(page_title="Predictions", page_icon="📈", layout="wide")
 
 # These functions are used in the main page code below to keep things organized and reusable.
 
-def prepare_model_data(df, target, key_prefix):
+def prepare_model_data(df, target, key_prefix, classification):
     # Every column except the target is a possible predictor.
     feature_candidates = [col for col in df.columns if col != target]
 
@@ -51,6 +95,9 @@ def prepare_model_data(df, target, key_prefix):
         st.warning("No usable input variables are available for this model.")
         return None
 
+    # Optional screening scores every usable predictor against the target to guide the selection below.
+    show_feature_screening(df, target, usable_features, classification, key_prefix)
+
     # Let the user pick which predictors they want to use.
     selected_features = st.multiselect(
         "Select your input variables",
@@ -62,19 +109,174 @@ def prepare_model_data(df, target, key_prefix):
         st.info("Choose at least one input variable to continue.")
         return None
 
-    # X contains the predictor columns.
+    # X contains the raw predictor columns.
     # y contains the target column we are trying to predict.
+    # Dummy coding happens after the train/test split (see preprocess), so it only learns from training rows.
     X = df[selected_features].copy()
     y = df[target].copy()
 
-    if dummy_code == "Yes":
-        # Convert text/category predictors into 0/1 dummy columns.
-        # drop_first=True avoids the dummy variable trap by leaving out one category as the baseline.
-        X = pd.get_dummies(X, drop_first=True)
-
     return X, y
 
 
+def quantile_codes(values, bins=SCREENING_BINS):
+    # Percentile ranks turn every numeric column into equal-sized bins in one vectorized step; missing values get -1.
+    ranks = pd.DataFrame(values).rank(pct=True).to_numpy()
+    return np.where(np.isnan(ranks), -1, np.clip(np.ceil(ranks * bins) - 1, 0, bins - 1)).astype(int)
+
+
+def masked_correlation(X, y):
+    # Pearson correlation of every column with y at once, using only the rows where each column is present.
+    valid = ~np.isnan(X)
+    x0 = np.where(valid, X, 0.0)
+    n = valid.sum(axis=0)
+    sum_x, sum_y = x0.sum(axis=0), (valid * y[:, None]).sum(axis=0)
+    sum_xy, sum_xx, sum_yy = (x0 * y[:, None]).sum(axis=0), (x0 ** 2).sum(axis=0), (valid * (y ** 2)[:, None]).sum(axis=0)
+
+    denominator = np.sqrt((n * sum_xx - sum_x ** 2) * (n * sum_yy - sum_y ** 2))
+    r = np.clip(safe_divide(n * sum_xy - sum_x * sum_y, denominator), -1, 1)
+    # A perfect linear relationship (|r| = 1) has an infinite t statistic and a p-value of 0.
+    perfect = (1 - r ** 2 <= 1e-12) & (n > 2)
+    t_stat = np.where(perfect, np.inf, r * np.sqrt(safe_divide(n - 2.0, 1 - r ** 2)))
+    return r, 2 * stats.t.sf(np.abs(t_stat), np.maximum(n - 2, 1))
+
+
+def grouped_anova(groups, values, n_groups):
+    # One-way ANOVA F for every column at once: group counts, sums, and sums of squares
+    # for all columns come from three np.bincount calls over (column, group) ids.
+    valid = (groups >= 0) & ~np.isnan(values)
+    n_cols = groups.shape[1]
+    ids = (np.arange(n_cols)[None, :] * n_groups + groups)[valid]
+    v = values[valid]
+
+    counts = np.bincount(ids, minlength=n_cols * n_groups).reshape(n_cols, n_groups)
+    sums = np.bincount(ids, weights=v, minlength=n_cols * n_groups).reshape(n_cols, n_groups)
+    squares = np.bincount(ids, weights=v * v, minlength=n_cols * n_groups).reshape(n_cols, n_groups)
+
+    n = counts.sum(axis=1)
+    grand = safe_divide(sums.sum(axis=1) ** 2, n)
+    ss_total = squares.sum(axis=1) - grand
+    ss_between = safe_divide(sums ** 2, counts).sum(axis=1) - grand
+    ss_within = np.maximum(ss_total - ss_between, 0)
+    df_between = (counts > 0).sum(axis=1) - 1
+    df_within = n - df_between - 1
+
+    # No spread inside the groups but some between them means the groups separate the values perfectly:
+    # F is infinite and the p-value is 0.
+    perfect = (ss_within <= 1e-12 * ss_total) & (ss_between > 0) & (df_between > 0) & (df_within > 0)
+    f_stat = np.where(
+        perfect, np.inf, safe_divide(safe_divide(ss_between, df_between), safe_divide(ss_within, df_within)))
+    return f_stat, stats.f.sf(f_stat, np.maximum(df_between, 1), np.maximum(df_within, 1))
+
+
+def contingency_tables(codes, y_codes, n_levels, n_classes):
+    # One np.bincount builds the (feature level x target class) table of every column in the chunk.
+    valid = codes >= 0
+    n_cols = codes.shape[1]
+    ids = (np.arange(n_cols)[None, :] * n_levels * n_classes + codes * n_classes + y_codes[:, None])[valid]
+    return np.bincount(ids, minlength=n_cols * n_levels * n_classes).reshape(n_cols, n_levels, n_classes).astype(float)
+
+
+def screen_chunk(chunk, y, y_codes, n_classes, classification):
+    numeric = np.array([is_numeric_dtype(chunk[col]) and not is_bool_dtype(chunk[col]) for col in chunk.columns])
+
+    # Numeric columns are binned by quantile; categorical columns use their categories (missing stays -1).
+    codes = np.full(chunk.shape, -1, dtype=int)
+    numeric_values = chunk.loc[:, numeric].to_numpy(dtype=float)
+    codes[:, numeric] = quantile_codes(numeric_values)
+    for position in np.flatnonzero(~numeric):
+        codes[:, position] = pd.factorize(chunk.iloc[:, position])[0]
+    n_levels = max(int(codes.max()) + 1, 1)
+
+    # Mutual information from the contingency tables works for every feature and target type.
+    tables = contingency_tables(codes, y_codes, n_levels, n_classes)
+    totals = tables.sum(axis=(1, 2))[:, None, None]
+    expected = tables.sum(axis=2)[:, :, None] * tables.sum(axis=1)[:, None, :]
+    joint = safe_divide(tables, np.broadcast_to(totals, tables.shape))
+    mutual_info = (joint * np.log(np.where(tables > 0, safe_divide(tables * totals, expected), 1.0))).sum(axis=(1, 2))
+
+    statistic = np.full(len(chunk.columns), np.nan)
+    p_value = np.full(len(chunk.columns), np.nan)
+    test = np.empty(len(chunk.columns), dtype=object)
+
+    if numeric.any():
+        if classification:
+            # Numeric feature vs class target: do the class means differ?
+            groups = np.broadcast_to(y_codes[:, None], numeric_values.shape)
+            statistic[numeric], p_value[numeric] = grouped_anova(groups, numeric_values, n_classes)
+            test[numeric] = "ANOVA F"
+        else:
+            statistic[numeric], p_value[numeric] = masked_correlation(numeric_values, y)
+            test[numeric] = "Correlation"
+
+    if (~numeric).any():
+        if classification:
+            # Categorical feature vs class target: chi-square test on the same contingency tables.
+            cat_tables = tables[~numeric]
+            cat_expected = safe_divide(expected[~numeric], np.broadcast_to(totals[~numeric], cat_tables.shape))
+            chi_square = safe_divide((cat_tables - cat_expected) ** 2, cat_expected).sum(axis=(1, 2))
+            dof = ((cat_tables.sum(axis=2) > 0).sum(axis=1) - 1) * ((cat_tables.sum(axis=1) > 0).sum(axis=1) - 1)
+            statistic[~numeric], p_value[~numeric] = chi_square, stats.chi2.sf(chi_square, np.maximum(dof, 1))
+            test[~numeric] = "Chi-square"
+        else:
+            # Categorical feature vs numeric target: does the target mean differ across categories?
+            values = np.broadcast_to(y[:, None], (len(y), int((~numeric).sum())))
+            statistic[~numeric], p_value[~numeric] = grouped_anova(codes[:, ~numeric], values, n_levels)
+            test[~numeric] = "ANOVA F"
+
+    return pd.DataFrame({
+        "Feature": chunk.columns,
+        "Type": np.where(numeric, "Numeric", "Categorical"),
+        "Test": test,
+        "Statistic": statistic,
+        "p-value": p_value,
+        "Mutual Information": mutual_info
+    })
+
+
+@st.cache_data(show_spinner="Screening candidate predictors...")
+def screen_features(_df, data_version, dataset_name, target, classification):
+    # Cached per (dataset version, target); the dataframe itself is not hashed, which keeps wide data fast.
+    df_target = _df[_df[target].notna()]
+    if classification:
+        y_codes, classes = pd.factorize(df_target[target])
+        y = y_codes.astype(float)
+        n_classes = len(classes)
+    else:
+        y = df_target[target].to_numpy(dtype=float)
+        # Numeric targets are binned into quantiles so mutual information can use contingency tables too.
+        y_codes = quantile_codes(y[:, None])[:, 0]
+        n_classes = SCREENING_BINS
+
+    candidates = [col for col in _df.columns if col != target]
+    results = [
+        screen_chunk(df_target[candidates[start:start + SCREENING_CHUNK_COLUMNS]], y, y_codes, n_classes, classification)
+        for start in range(0, len(candidates), SCREENING_CHUNK_COLUMNS)
+    ]
+    # The p-values put every test on the same scale, so they decide the ranking.
+    return pd.concat(results, ignore_index=True).sort_values(["p-value", "Mutual Information"], ascending=[True, False])
+
+
+def show_feature_screening(df, target, usable_features, classification, key_prefix):
+    if not st.toggle("🔎 Screen predictors against the target", key=f"{key_prefix}_screening",
+                     help="Scores every usable input variable against the target so you can pick strong predictors."):
+        return
+
+    scores = screen_features(
+        df, st.session_state["data_version"], st.session_state.get("dataset_name"), target, classification)
+    scores = scores[scores["Feature"].isin(usable_features)]
+
+    st.caption(
+        "Mutual information measures any kind of relationship (higher is stronger). The test column shows a "
+        "correlation, ANOVA F, or chi-square test depending on the feature and target types; small p-values "
+        "suggest a real relationship.")
+    st.dataframe(scores.round(4), use_container_width=True, height=250, hide_index=True)
+
+    # The button fills the multiselect below, which has to happen before that widget is drawn.
+    top_n = min(10, len(scores))
+    if st.button(f"Select the top {top_n} predictors", key=f"{key_prefix}_select_top"):
+        st.session_state[f"{key_prefix}_features"] = scores["Feature"].head(top_n).tolist()
+
+
 def handle_missing(modeling_df, target, key):
     # Count how many rows in the modeling dataset contain missing values.
     missing_rows = int(modeling_df.isnull().any(axis=1).sum())
@@ -116,20 +318,127 @@ def get_test_size(key):
     )
 
 
+def bootstrap_index_chunks(n_rows, n_resamples=BOOTSTRAP_RESAMPLES, random_state=42):
+    # Each row of an index matrix is one bootstrap resample of the test set (drawn with replacement).
+    # All resamples are drawn together, but in chunks so that resamples x rows stays under the memory cap.
+    rng = np.random.default_rng(random_state)
+    chunk_size = max(1, min(n_resamples, BOOTSTRAP_MAX_CELLS // max(n_rows, 1)))
+    for start in range(0, n_resamples, chunk_size):
+        size = min(chunk_size, n_resamples - start)
+        yield rng.integers(0, n_rows, size=(size, n_rows))
+
+
+def confidence_bounds(values, level=CONFIDENCE_LEVEL):
+    # Percentile interval: the middle `level` share of the bootstrap distribution.
+    tail = (1 - level) / 2 * 100
+    low, high = np.nanpercentile(values, [tail, 100 - tail])
+    return low, high
+
+
+def safe_divide(numerator, denominator):
+    # Matches sklearn's zero_division=0: empty denominators give a score of 0.
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator, dtype=float), where=denominator > 0)
+
+
+def bootstrap_classification_metrics(y_test, y_pred, pos_label=None):
+    # Encode actual and predicted labels with one shared set of integer codes.
+    labels = pd.concat([pd.Series(y_test), pd.Series(y_pred)], ignore_index=True)
+    codes, classes = pd.factorize(labels, sort=True)
+    n_rows = len(y_test)
+    n_classes = len(classes)
+    true_codes, pred_codes = codes[:n_rows], codes[n_rows:]
+
+    # Each row falls into exactly one confusion-matrix cell, so we store that cell id once
+    # and let np.bincount count the cells for every resample at the same time.
+    cell_ids = true_codes * n_classes + pred_codes
+    n_cells = n_classes * n_classes
+
+    matrices = []
+    for indices in bootstrap_index_chunks(n_rows):
+        # Offsetting by resample number gives every resample its own block of cells.
+        offsets = (np.arange(len(indices)) * n_cells)[:, None]
+        counts = np.bincount((cell_ids[indices] + offsets).ravel(), minlength=len(indices) * n_cells)
+        matrices.append(counts.reshape(len(indices), n_classes, n_classes))
+    cms = np.concatenate(matrices)
+
+    # Rows of each confusion matrix are actual classes, columns are predicted classes.
+    true_positives = np.diagonal(cms, axis1=1, axis2=2).astype(float)
+    actual_counts = cms.sum(axis=2).astype(float)
+    predicted_counts = cms.sum(axis=1).astype(float)
+
+    precision = safe_divide(true_positives, predicted_counts)
+    recall = safe_divide(true_positives, actual_counts)
+    f1 = safe_divide(2 * precision * recall, precision + recall)
+
+    if pos_label is not None:
+        # Binary problems report the scores of the positive class only.
+        pos_index = classes.get_loc(pos_label)
+        precision, recall, f1 = precision[:, pos_index], recall[:, pos_index], f1[:, pos_index]
+    else:
+        # Multiclass problems use the support-weighted average, like average="weighted".
+        weights = actual_counts / n_rows
+        precision, recall, f1 = (weights * precision).sum(axis=1), (weights * recall).sum(axis=1), (weights * f1).sum(axis=1)
+
+    return {
+        "Accuracy": confidence_bounds(true_positives.sum(axis=1) / n_rows),
+        "Precision": confidence_bounds(precision),
+        "Recall": confidence_bounds(recall),
+        "F1 Score": confidence_bounds(f1)
+    }
+
+
+def bootstrap_regression_metrics(y_test, y_pred):
+    y_true = np.asarray(y_test, dtype=float)
+    squared_errors = (y_true - np.asarray(y_pred, dtype=float)) ** 2
+
+    mse_values = []
+    r2_values = []
+    for indices in bootstrap_index_chunks(len(y_true)):
+        # Gathering with the index matrix gives one row of errors per resample.
+        sse = squared_errors[indices].sum(axis=1)
+        sampled_true = y_true[indices]
+        sst = ((sampled_true - sampled_true.mean(axis=1, keepdims=True)) ** 2).sum(axis=1)
+        mse_values.append(sse / len(y_true))
+        # A resample where every actual value is identical has no variance to explain.
+        r2_values.append(np.where(sst > 0, 1 - sse / np.where(sst > 0, sst, 1), np.nan))
+
+    mse_values = np.concatenate(mse_values)
+    return {
+        "MSE": confidence_bounds(mse_values),
+        "RMSE": confidence_bounds(np.sqrt(mse_values)),
+        "R²": confidence_bounds(np.concatenate(r2_values))
+    }
+
+
+def show_interval(column, bounds):
+    # Small caption shown under a metric with its bootstrap confidence interval.
+    low, high = bounds
+    column.caption(f"{CONFIDENCE_LEVEL:.0%} CI: {low:.2f} – {high:.2f}")
+
+
 def show_regression_results(y_test, y_pred):
     # Display the main regression performance metrics.
     st.markdown("### 📊 Regression Results")
 
     # These metrics are commonly used to evaluate regression models. Lower MSE and RMSE values 
     # indicate better fit, while R² closer to 1 means the model explains more variance.
+    metrics = regression_metrics(y_test, y_pred)
+
     col1, col2, col3 = st.columns(3)
-    col1.metric("MSE", f"{mean_squared_error(y_test, y_pred):.2f}",
+    col1.metric("MSE", f"{metrics['MSE']:.2f}",
     help="The average squared difference between estimated values and the actual value")
-    col2.metric("RMSE", f"{root_mean_squared_error(y_test, y_pred):.2f}",
+    col2.metric("RMSE", f"{metrics['RMSE']:.2f}",
     help="The average difference between values predicted by the model and the actual observed values")
-    col3.metric("R²", f"{r2_score(y_test, y_pred):.2f}",
+    col3.metric("R²", f"{metrics['R²']:.2f}",
     help="The proportion of variance in the dependent variable explained by a regression model's independent variable(s)")
 
+    # Bootstrap the test set so each metric comes with a range instead of a single noisy number.
+    intervals = bootstrap_regression_metrics(y_test, y_pred)
+    show_interval(col1, intervals["MSE"])
+    show_interval(col2, intervals["RMSE"])
+    show_interval(col3, intervals["R²"])
+    st.caption(f"Intervals come from {BOOTSTRAP_RESAMPLES:,} bootstrap resamples of the test set.")
+
     # Show a few actual values next to their predicted values.
     st.markdown("### 🔍 Actual vs Predicted")
     results_df = pd.DataFrame({
@@ -139,41 +448,269 @@ def show_regression_results(y_test, y_pred):
     })
     st.dataframe(results_df.head(10), use_container_width=True, height=250)
 
-
-def show_classification_results(y_test, y_pred, y_score=None):
-    st.markdown("### 📊 Classification Results")
+    # The point metrics are returned so the run can be recorded in the experiment store.
+    return metrics
+
+
+def build_score_curve(y_true_binary, y_score):
+    # Sort the probability scores once and keep running totals of positives and scores.
+    # Every threshold-based metric below is read from these arrays instead of re-scanning the data.
+    order = np.argsort(y_score, kind="mergesort")
+    sorted_scores = np.asarray(y_score, dtype=float)[order]
+    sorted_truth = np.asarray(y_true_binary, dtype=int)[order]
+
+    return {
+        "scores": sorted_scores,
+        # cum_positives[i] is the number of positive rows among the i lowest scores.
+        "cum_positives": np.concatenate([[0], np.cumsum(sorted_truth)]),
+        "cum_scores": np.concatenate([[0.0], np.cumsum(sorted_scores)]),
+        "n_rows": len(sorted_scores),
+        "n_positives": int(sorted_truth.sum())
+    }
+
+
+def counts_at_threshold(curve, threshold):
+    # Rows scoring at or above the threshold are predicted positive.
+    # A binary search finds how many rows fall below it, and the running totals do the rest.
+    below = int(np.searchsorted(curve["scores"], threshold, side="left"))
+    false_negatives = int(curve["cum_positives"][below])
+    true_positives = curve["n_positives"] - false_negatives
+    false_positives = (curve["n_rows"] - below) - true_positives
+    true_negatives = below - false_negatives
+    return true_positives, false_positives, false_negatives, true_negatives
+
+
+def precision_recall_points(curve):
+    # Walking from the highest score down, each distinct score is one possible threshold.
+    scores = curve["scores"]
+    n_rows, n_positives = curve["n_rows"], curve["n_positives"]
+
+    # Position of the first row for each distinct score (the scores are already sorted).
+    starts = np.flatnonzero(np.r_[True, scores[1:] != scores[:-1]])
+    predicted_positive = n_rows - starts
+    true_positives = n_positives - curve["cum_positives"][starts]
+
+    precision = true_positives / predicted_positive
+    recall = true_positives / n_positives if n_positives else np.zeros_like(precision, dtype=float)
+    return precision, recall, scores[starts]
+
+
+def calibration_points(curve, n_bins=10):
+    # Equal-width probability bins; the bin edges are located in the sorted scores by binary search.
+    edges = np.searchsorted(curve["scores"], np.linspace(0, 1, n_bins + 1)[1:-1], side="right")
+    bounds = np.concatenate([[0], edges, [curve["n_rows"]]])
+    bin_counts = np.diff(bounds)
+    filled = bin_counts > 0
+
+    mean_score = np.diff(curve["cum_scores"][bounds])[filled] / bin_counts[filled]
+    positive_rate = np.diff(curve["cum_positives"][bounds])[filled] / bin_counts[filled]
+    return mean_score, positive_rate, bin_counts[filled]
+
+
+def sorted_rate_curves(truth, scores):
+    # Every column is one scoring problem (one class vs the rest). Each column is sorted once,
+    # from highest to lowest score, and running counts give the rates at every possible threshold.
+    order = np.argsort(-scores, axis=0, kind="mergesort")
+    sorted_scores = np.take_along_axis(scores, order, axis=0)
+    sorted_truth = np.take_along_axis(truth, order, axis=0)
+
+    true_positives = np.cumsum(sorted_truth, axis=0)
+    false_positives = np.arange(1, len(scores) + 1)[:, None] - true_positives
+    positives = true_positives[-1]
+    negatives = len(scores) - positives
+
+    # Tied scores share one threshold, so only the last row of each tie is a curve point.
+    is_threshold = np.vstack([sorted_scores[1:] != sorted_scores[:-1], np.ones((1, scores.shape[1]), dtype=bool)])
+
+    curves = []
+    for col in range(scores.shape[1]):
+        # A class with no positive (or no negative) test rows has no defined curve.
+        if positives[col] == 0 or negatives[col] == 0:
+            curves.append(None)
+            continue
+
+        keep = is_threshold[:, col]
+        tp, fp = true_positives[keep, col], false_positives[keep, col]
+        fpr = np.r_[0, fp / negatives[col]]
+        tpr = np.r_[0, tp / positives[col]]
+        recall = tp / positives[col]
+        precision = tp / (tp + fp)
+
+        curves.append({
+            "fpr": fpr,
+            "tpr": tpr,
+            "recall": np.r_[0, recall],
+            "precision": np.r_[1, precision],
+            "auc": np.trapezoid(tpr, fpr),
+            # Average precision: precision weighted by each step in recall.
+            "ap": np.sum(np.diff(np.r_[0, recall]) * precision)
+        })
+    return curves
+
+
+def one_vs_rest_curves(y_test, y_proba, class_labels):
+    # One 0/1 column per class, in the same column order as predict_proba.
+    truth = (np.asarray(y_test)[:, None] == np.asarray(class_labels)[None, :]).astype(int)
+    scores = np.asarray(y_proba, dtype=float)
+
+    # All class columns are processed together in one vectorized pass.
+    per_class = dict(zip([str(label) for label in class_labels], sorted_rate_curves(truth, scores)))
+    per_class = {name: curve for name, curve in per_class.items() if curve is not None}
+
+    # Micro average pools every (row, class) pair into one big binary problem.
+    micro = sorted_rate_curves(truth.reshape(-1, 1), scores.reshape(-1, 1))[0]
+
+    # Macro average gives every class equal weight by averaging the class curves on shared grids.
+    fpr_grid = np.unique(np.concatenate([curve["fpr"] for curve in per_class.values()]))
+    recall_grid = np.linspace(0, 1, 101)
+    macro = {
+        "fpr": fpr_grid,
+        "tpr": np.mean([np.interp(fpr_grid, curve["fpr"], curve["tpr"]) for curve in per_class.values()], axis=0),
+        "recall": recall_grid,
+        "precision": np.mean([np.interp(recall_grid, curve["recall"], curve["precision"]) for curve in per_class.values()], axis=0),
+        "auc": np.mean([curve["auc"] for curve in per_class.values()]),
+        "ap": np.mean([curve["ap"] for curve in per_class.values()])
+    }
+    return {"classes": per_class, "micro": micro, "macro": macro}
+
+
+def show_multiclass_curves(curves):
+    st.markdown("### One-vs-Rest ROC and Precision-Recall Curves")
+    st.caption(
+        "Each class is scored against all other classes. The micro average pools every prediction together, "
+        "while the macro average gives each class equal weight.")
+
+    fig, (roc_ax, pr_ax) = plt.subplots(1, 2, figsize=(12, 5.5))
+
+    # Drawing every class gets unreadable with many classes, so only the averages are shown then.
+    if len(curves["classes"]) <= 10:
+        for name, curve in curves["classes"].items():
+            roc_ax.plot(curve["fpr"], curve["tpr"], alpha=0.6, label=f"{name} (AUC = {curve['auc']:.2f})")
+            pr_ax.plot(curve["recall"], curve["precision"], alpha=0.6, label=f"{name} (AP = {curve['ap']:.2f})")
+
+    for name, style in [("micro", ":"), ("macro", "--")]:
+        curve = curves[name]
+        roc_ax.plot(curve["fpr"], curve["tpr"], linestyle=style, linewidth=2.5, color="black" if name == "micro" else "#ff4b4b",
+                    label=f"{name.title()} average (AUC = {curve['auc']:.2f})")
+        pr_ax.plot(curve["recall"], curve["precision"], linestyle=style, linewidth=2.5, color="black" if name == "micro" else "#ff4b4b",
+                   label=f"{name.title()} average (AP = {curve['ap']:.2f})")
+
+    roc_ax.plot([0, 1], [0, 1], linestyle="--", color="gray", alpha=0.5)
+    roc_ax.set_title("ROC Curves")
+    roc_ax.set_xlabel("False Positive Rate")
+    roc_ax.set_ylabel("True Positive Rate")
+    pr_ax.set_title("Precision-Recall Curves")
+    pr_ax.set_xlabel("Recall")
+    pr_ax.set_ylabel("Precision")
+
+    for ax in (roc_ax, pr_ax):
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, 1.05)
+        ax.legend(loc="lower left" if ax is pr_ax else "lower right", fontsize="small")
+
+    fig.tight_layout()
+    st.pyplot(fig, use_container_width=True)
+    plt.close(fig)
+
+
+@st.fragment
+def show_threshold_explorer(curve, class_names):
+    # This section is a fragment, so moving the slider only reruns this block (no model refit),
+    # and each new threshold costs one binary search over the sorted scores.
+    st.markdown("### 🎚️ Threshold Explorer")
+    st.caption(f"Rows with a predicted probability of `{class_names[1]}` at or above the threshold are labeled `{class_names[1]}`.")
+
+    threshold = st.slider("Decision threshold", 0.0, 1.0, 0.5, step=0.01, key="threshold_explorer")
+    tp, fp, fn, tn = counts_at_threshold(curve, threshold)
+
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
 
     col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Accuracy", f"{(tp + tn) / curve['n_rows']:.2f}")
+    col2.metric("Precision", f"{precision:.2f}")
+    col3.metric("Recall", f"{recall:.2f}")
+    col4.metric("F1 Score", f"{f1:.2f}")
+
+    matrix_col, pr_col, calibration_col = st.columns(3)
+
+    with matrix_col:
+        st.markdown("#### Confusion Matrix")
+        # Same layout as the main confusion matrix: rows are actual classes, columns are predicted classes.
+        disp = ConfusionMatrixDisplay(confusion_matrix=np.array([[tn, fp], [fn, tp]]), display_labels=class_names)
+        fig, ax = plt.subplots(figsize=(5, 5))
+        disp.plot(ax=ax, cmap="Blues", colorbar=False)
+        fig.subplots_adjust(left=0.16, right=0.96, bottom=0.16, top=0.92)
+        st.pyplot(fig, use_container_width=True)
+        plt.close(fig)
 
-    col1.metric("Accuracy", f"{accuracy_score(y_test, y_pred):.2f}",
-    help="The proportion of correct predictions made by a model out of the total number of predictions made")
+    with pr_col:
+        st.markdown("#### Precision-Recall Curve")
+        pr_precision, pr_recall, _ = precision_recall_points(curve)
+        fig, ax = plt.subplots(figsize=(5, 5))
+        ax.plot(pr_recall, pr_precision)
+        ax.scatter([recall], [precision], color="#ff4b4b", zorder=3, label="Selected threshold")
+        ax.set_xlabel("Recall")
+        ax.set_ylabel("Precision")
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, 1.05)
+        ax.legend(loc="lower left")
+        fig.subplots_adjust(left=0.16, right=0.96, bottom=0.16, top=0.92)
+        st.pyplot(fig, use_container_width=True)
+        plt.close(fig)
 
-    # ✅ ADD THIS (1 line fix)
-    unique_classes = sorted(pd.Series(y_test).unique())
+    with calibration_col:
+        st.markdown("#### Calibration Curve")
+        mean_score, positive_rate, _ = calibration_points(curve)
+        fig, ax = plt.subplots(figsize=(5, 5))
+        ax.plot(mean_score, positive_rate, marker="o")
+        # Points on the dashed diagonal mean predicted probabilities match observed rates.
+        ax.plot([0, 1], [0, 1], linestyle="--")
+        ax.set_xlabel("Mean Predicted Probability")
+        ax.set_ylabel("Observed Positive Rate")
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, 1)
+        fig.subplots_adjust(left=0.16, right=0.96, bottom=0.16, top=0.92)
+        st.pyplot(fig, use_container_width=True)
+        plt.close(fig)
 
-    if len(unique_classes) == 2:
-        pos_label = unique_classes[-1]
 
-        precision = precision_score(y_test, y_pred, pos_label=pos_label, zero_division=0)
-        recall = recall_score(y_test, y_pred, pos_label=pos_label, zero_division=0)
-        f1 = f1_score(y_test, y_pred, pos_label=pos_label, zero_division=0)
+def show_classification_results(y_test, y_pred, y_score=None, y_proba=None, class_labels=None):
+    st.markdown("### 📊 Classification Results")
 
-    else:
-        precision = precision_score(y_test, y_pred, average="weighted", zero_division=0)
-        recall = recall_score(y_test, y_pred, average="weighted", zero_division=0)
-        f1 = f1_score(y_test, y_pred, average="weighted", zero_division=0)
+    col1, col2, col3, col4 = st.columns(4)
 
-    col2.metric("Precision", f"{precision:.2f}",
+    # Binary targets score the last sorted class as positive; multiclass targets use weighted averages.
+    metrics = classification_metrics(y_test, y_pred)
+    unique_classes = sorted(pd.Series(y_test).unique())
+    pos_label = unique_classes[-1] if len(unique_classes) == 2 else None
+
+    col1.metric("Accuracy", f"{metrics['Accuracy']:.2f}",
+    help="The proportion of correct predictions made by a model out of the total number of predictions made")
+
+    col2.metric("Precision", f"{metrics['Precision']:.2f}",
     help="The accuracy of positive predictions")
 
-    col3.metric("Recall", f"{recall:.2f}",
+    col3.metric("Recall", f"{metrics['Recall']:.2f}",
     help="The ability of the model to identify all relevant instances of a positive class")
 
-    col4.metric("F1 Score", f"{f1:.2f}",
+    col4.metric("F1 Score", f"{metrics['F1 Score']:.2f}",
     help="The harmonic mean of precision and recall")
 
+    # Bootstrap confidence intervals are built from one confusion matrix per resample.
+    intervals = bootstrap_classification_metrics(y_test, y_pred, pos_label)
+    show_interval(col1, intervals["Accuracy"])
+    show_interval(col2, intervals["Precision"])
+    show_interval(col3, intervals["Recall"])
+    show_interval(col4, intervals["F1 Score"])
+    st.caption(f"Intervals come from {BOOTSTRAP_RESAMPLES:,} bootstrap resamples of the test set.")
+
     st.divider()
 
+    # Multiclass curves need the full probability matrix and the class order of its columns.
+    is_multiclass = y_proba is not None and class_labels is not None and len(class_labels) > 2
+
     # Build the label list so all classes appear in the confusion matrix.
     labels = sorted(pd.Series(pd.concat([pd.Series(y_test), pd.Series(y_pred)])).astype(str).unique().tolist())
     chart_col1, chart_col2 = st.columns(2)
@@ -222,11 +759,26 @@ def show_classification_results(y_test, y_pred, y_score=None):
             fig.subplots_adjust(left=0.16, right=0.96, bottom=0.16, top=0.92)
             st.pyplot(fig, use_container_width=True)
             plt.close(fig)
+        elif is_multiclass:
+            st.info("This target has more than two classes, so one-vs-rest ROC and precision-recall curves are shown below.")
         else:
             st.info("ROC curve is shown for binary classification models when probability scores are available.")
 
     st.divider()
 
+    # Multiclass targets get one curve per class, plus micro and macro averages, in a single figure.
+    if is_multiclass:
+        show_multiclass_curves(one_vs_rest_curves(y_test, y_proba, class_labels))
+        st.divider()
+
+    # The threshold explorer needs the same binary probability scores as the ROC curve.
+    if y_score is not None and len(pd.Series(y_test).unique()) == 2:
+        binary_classes = sorted(pd.Series(y_test).unique())
+        class_names = [str(label) for label in binary_classes]
+        y_true_binary = (pd.Series(y_test) == binary_classes[-1]).astype(int)
+        show_threshold_explorer(build_score_curve(y_true_binary, y_score), class_names)
+        st.divider()
+
     # Show a few actual labels next to the predicted labels.
     st.markdown("### 🔍 Actual vs Predicted")
     results_df = pd.DataFrame({
@@ -235,6 +787,9 @@ def show_classification_results(y_test, y_pred, y_score=None):
     })
     st.dataframe(results_df.head(10), use_container_width=True, height=250)
 
+    # The point metrics are returned so the run can be recorded in the experiment store.
+    return metrics
+
 
 def show_coefficients(feature_names, coefficients, intercept, title="Feature Coefficients"):
     # Build a coefficient table so the user can see how each feature contributes.
@@ -272,13 +827,560 @@ def show_importances(feature_names, importances, title="Feature Importances"):
     st.dataframe(df_imp.round(4), use_container_width=True, height=250)
 
 
-def apply_scaling(X, key_suffix):
-    # Standardize numeric features so they are centered and scaled.
-    # This is most useful for linear and logistic regression.
-    scaler = StandardScaler()
-    X_scaled = pd.DataFrame(scaler.fit_transform(X), columns=X.columns, index=X.index)
-    st.info("📐 Numeric features were scaled using StandardScaler.")
-    return X_scaled
+def model_fingerprint(model):
+    # Fitted models are identified by the hash of their pickled state, so two identical fits share a fingerprint.
+    return hashlib.sha1(pickle.dumps(model)).hexdigest()
+
+
+@st.cache_data(show_spinner="Computing permutation importance...")
+def compute_permutation_importance(_model, fingerprint, X_test, y_test, metric, n_repeats=5, random_state=42):
+    # The leading underscore tells Streamlit not to hash the model itself; its fingerprint is hashed instead.
+    # That keeps the result cached with the model: the same fit on the same split never recomputes its importances.
+    model = _model
+    score = accuracy_score if metric == "accuracy" else r2_score
+    feature_names = list(X_test.columns)
+    base_matrix = X_test.to_numpy(dtype=float)
+    y_true = np.asarray(y_test)
+    n_rows = len(base_matrix)
+    baseline = score(y_true, model.predict(pd.DataFrame(base_matrix, columns=feature_names)))
+
+    # Each worker thread gets one preallocated copy of the test matrix (wrapped in a dataframe without copying).
+    # A task shuffles one column in place, scores the model, then restores that column for the next task.
+    worker = threading.local()
+
+    def score_permutation(task):
+        col, repeat = task
+        if not hasattr(worker, "matrix"):
+            worker.matrix = base_matrix.copy()
+            worker.frame = pd.DataFrame(worker.matrix, columns=feature_names, copy=False)
+
+        # Seeding by (feature, repeat) keeps the shuffles the same no matter which worker runs the task.
+        rng = np.random.default_rng([random_state, col, repeat])
+        worker.matrix[:, col] = base_matrix[rng.permutation(n_rows), col]
+        permuted_score = score(y_true, model.predict(worker.frame))
+        worker.matrix[:, col] = base_matrix[:, col]
+        return col, repeat, permuted_score
+
+    # Every (feature x repeat) pair is an independent task spread over the worker pool.
+    tasks = [(col, repeat) for col in range(len(feature_names)) for repeat in range(n_repeats)]
+    drops = np.zeros((len(feature_names), n_repeats))
+    with ThreadPoolExecutor(max_workers=min(len(tasks), os.cpu_count() or 1)) as pool:
+        for col, repeat, permuted_score in pool.map(score_permutation, tasks):
+            drops[col, repeat] = baseline - permuted_score
+
+    return pd.DataFrame({
+        "Feature": feature_names,
+        "Importance": drops.mean(axis=1),
+        "Std": drops.std(axis=1)
+    }).sort_values("Importance", ascending=False)
+
+
+def show_permutation_importance(model, X_test, y_test, metric, key):
+    # Permutation importance works the same way for every model, so values can be compared across models.
+    st.markdown("### 🔀 Permutation Importance")
+    st.caption(
+        "Shuffles one feature at a time in the test set and measures how much the "
+        f"{'accuracy' if metric == 'accuracy' else 'R²'} drops. Bigger drops mean the model depends more on that feature.")
+
+    if not st.toggle("Compute permutation importance", key=key):
+        return
+
+    df_perm = compute_permutation_importance(model, model_fingerprint(model), X_test, y_test, metric)
+
+    # Horizontal bars with error bars show the average drop and how much it varied across repeats.
+    fig, ax = plt.subplots(figsize=(8, max(3, 0.35 * len(df_perm))))
+    ax.barh(df_perm["Feature"], df_perm["Importance"], xerr=df_perm["Std"], color="#1C8510", alpha=0.8)
+    ax.invert_yaxis()
+    ax.axvline(0, color="gray", linewidth=1)
+    ax.set_xlabel(f"Drop in {'accuracy' if metric == 'accuracy' else 'R²'}")
+    fig.tight_layout()
+    st.pyplot(fig, use_container_width=True)
+    plt.close(fig)
+    st.dataframe(df_perm.round(4), use_container_width=True, height=250)
+
+
+@st.cache_data(show_spinner="Computing feature contributions...")
+def compute_xgb_contributions(_model, fingerprint, X_test):
+    # XGBoost can return each feature's contribution to every prediction directly from the trees
+    # (pred_contribs=True), for the whole test set in one batched call.
+    contribs = _model.get_booster().predict(DMatrix(X_test), pred_contribs=True)
+
+    # Binary models return (rows, features + 1); multiclass models add a class axis in the middle.
+    # Either way, the last column is the base value the contributions start from.
+    if contribs.ndim == 2:
+        contribs = contribs[:, None, :]
+    return contribs
+
+
+def show_xgb_contributions(model, X_test, class_names):
+    st.markdown("### 🧩 Per-Prediction Feature Contributions")
+    st.caption(
+        "Each point is one test row. Its position shows how much that feature pushed the prediction up or down "
+        "(in log-odds), and its color shows whether the feature value was high or low.")
+
+    contribs = compute_xgb_contributions(model, model_fingerprint(model), X_test)
+
+    # Binary models explain the positive class; multiclass models explain one chosen class at a time.
+    if contribs.shape[1] == 1:
+        class_index = 0
+        explained_class = class_names[-1]
+    else:
+        explained_class = st.selectbox("Class to explain", class_names, key="xgb_contrib_class")
+        class_index = list(class_names).index(explained_class)
+
+    class_contribs = contribs[:, class_index, :-1]
+    feature_values = X_test.to_numpy(dtype=float)
+
+    # Order features by their average absolute contribution and keep the 15 strongest for the summary view.
+    strength = np.abs(class_contribs).mean(axis=0)
+    top_features = np.argsort(strength)[::-1][:15]
+
+    fig, ax = plt.subplots(figsize=(9, max(3, 0.45 * len(top_features))))
+    rng = np.random.default_rng(42)
+    for position, col in enumerate(top_features):
+        # Feature values are rescaled to 0-1 so the color scale means "low" to "high" for every feature.
+        values = feature_values[:, col]
+        low, high = np.nanmin(values), np.nanmax(values)
+        colors = (values - low) / (high - low) if high > low else np.full(len(values), 0.5)
+        jitter = rng.uniform(-0.3, 0.3, len(values))
+        scatter = ax.scatter(class_contribs[:, col], position + jitter, c=colors, cmap="coolwarm", vmin=0, vmax=1, s=8, alpha=0.7)
+
+    ax.set_yticks(range(len(top_features)))
+    ax.set_yticklabels(X_test.columns[top_features])
+    ax.invert_yaxis()
+    ax.axvline(0, color="gray", linewidth=1)
+    ax.set_xlabel(f"Contribution to `{explained_class}` (log-odds)")
+    colorbar = fig.colorbar(scatter, ax=ax, ticks=[0, 1])
+    colorbar.ax.set_yticklabels(["Low", "High"])
+    colorbar.set_label("Feature value")
+    fig.tight_layout()
+    st.pyplot(fig, use_container_width=True)
+    plt.close(fig)
+
+    show_row_contributions(contribs[:, class_index, :], X_test, explained_class)
+
+
+@st.fragment
+def show_row_contributions(class_contribs, X_test, explained_class):
+    # Picking a different row only reruns this fragment; the contributions were already computed in bulk.
+    st.markdown("#### 🔎 Explain One Test Row")
+    row = st.number_input("Test row", min_value=0, max_value=len(X_test) - 1, value=0, step=1, key="xgb_contrib_row")
+
+    row_contribs = pd.DataFrame({
+        "Feature": X_test.columns,
+        "Value": X_test.iloc[row].values,
+        "Contribution": class_contribs[row, :-1]
+    })
+    row_contribs = row_contribs.reindex(row_contribs["Contribution"].abs().sort_values(ascending=False).index)
+    base_value = class_contribs[row, -1]
+
+    st.caption(
+        f"The model starts from a base value of {base_value:.3f} and adds each contribution, "
+        f"ending at {base_value + row_contribs['Contribution'].sum():.3f} log-odds for `{explained_class}`.")
+
+    top = row_contribs.head(10).iloc[::-1]
+    fig, ax = plt.subplots(figsize=(8, max(3, 0.4 * len(top))))
+    ax.barh(top["Feature"], top["Contribution"], color=np.where(top["Contribution"] >= 0, "#1C8510", "#ff4b4b"))
+    ax.axvline(0, color="gray", linewidth=1)
+    ax.set_xlabel("Contribution (log-odds)")
+    fig.tight_layout()
+    st.pyplot(fig, use_container_width=True)
+    plt.close(fig)
+    st.dataframe(row_contribs.round(4), use_container_width=True, height=250)
+
+
+@st.cache_data(show_spinner="Computing regularization path...")
+def compute_regularization_path(X_train, y_train, penalty, l1_ratio=0.5, random_state=42):
+    # A quarter of the training rows is held back to score every penalty strength on unseen data.
+    # The positions of the other rows are returned, because the chosen alpha only means the same penalty
+    # on the same number of rows (the penalty is not scaled by the row count).
+    fit_rows, val_rows = train_test_split(np.arange(len(X_train)), test_size=0.25, random_state=random_state)
+    X_fit, X_val = X_train.iloc[fit_rows].to_numpy(dtype=float), X_train.iloc[val_rows].to_numpy(dtype=float)
+    y_fit, y_val = np.asarray(y_train, dtype=float)[fit_rows], np.asarray(y_train, dtype=float)[val_rows]
+
+    # Centering lets the path solvers skip the intercept; it is added back from the means afterward.
+    x_mean, y_mean = X_fit.mean(axis=0), y_fit.mean()
+    X_centered, y_centered = X_fit - x_mean, y_fit - y_mean
+
+    if penalty == "ridge":
+        # Ridge has a closed form, so one SVD gives the exact solution for every alpha at once.
+        U, singular_values, Vt = np.linalg.svd(X_centered, full_matrices=False)
+        alphas = singular_values[0] ** 2 * np.logspace(1, -6, PATH_ALPHAS)
+        shrink = singular_values / (singular_values ** 2 + alphas[:, None])
+        coefs = Vt.T @ (shrink * (U.T @ y_centered)).T
+    else:
+        # Coordinate descent from the strongest penalty (all zeros) down to the weakest,
+        # warm-starting each alpha from the previous solution.
+        alphas, coefs, _ = enet_path(
+            X_centered, y_centered,
+            l1_ratio=1.0 if penalty == "lasso" else l1_ratio,
+            alphas=PATH_ALPHAS,
+            eps=1e-4
+        )
+
+    # coefs has one column per alpha, so all validation predictions come from one matrix product.
+    intercepts = y_mean - x_mean @ coefs
+    val_mse = ((X_val @ coefs + intercepts - y_val[:, None]) ** 2).mean(axis=0)
+    return alphas, coefs, val_mse, fit_rows
+
+
+def show_regularization_path(alphas, coefs, val_mse, feature_names, selected_alpha):
+    st.markdown("### 🛤️ Regularization Path")
+    st.caption(
+        "Left: how each coefficient shrinks as the penalty grows. Right: validation error for every penalty strength. "
+        "Pick a strength near the bottom of the validation curve. The path and the final model are both fitted on "
+        "75% of the training rows, and the other 25% draw the validation curve.")
+
+    path_col, error_col = st.columns(2)
+
+    with path_col:
+        fig, ax = plt.subplots(figsize=(6, 4.5))
+        # Only label the largest coefficients so the legend stays readable on wide data.
+        largest = np.argsort(np.abs(coefs).max(axis=1))[::-1]
+        for rank, row in enumerate(largest):
+            ax.plot(alphas, coefs[row], linewidth=1.5, label=feature_names[row] if rank < 8 else None)
+        ax.axvline(selected_alpha, color="#ff4b4b", linestyle="--")
+        ax.set_xscale("log")
+        ax.set_xlabel("Alpha (penalty strength)")
+        ax.set_ylabel("Coefficient")
+        ax.grid(True, alpha=0.3)
+        ax.legend(fontsize="small")
+        fig.tight_layout()
+        st.pyplot(fig, use_container_width=True)
+        plt.close(fig)
+
+    with error_col:
+        fig, ax = plt.subplots(figsize=(6, 4.5))
+        ax.plot(alphas, val_mse, marker="o", markersize=3, color="#1C8510")
+        ax.axvline(selected_alpha, color="#ff4b4b", linestyle="--", label="Selected alpha")
+        ax.set_xscale("log")
+        ax.set_xlabel("Alpha (penalty strength)")
+        ax.set_ylabel("Validation MSE")
+        ax.grid(True, alpha=0.3)
+        ax.legend()
+        fig.tight_layout()
+        st.pyplot(fig, use_container_width=True)
+        plt.close(fig)
+
+
+def node_depths(tree):
+    # sklearn always numbers a child after its parent, so one pass in node order fills every depth.
+    depths = np.zeros(tree.node_count, dtype=int)
+    for node in range(tree.node_count):
+        if tree.children_left[node] != -1:
+            depths[tree.children_left[node]] = depths[tree.children_right[node]] = depths[node] + 1
+    return depths
+
+
+def truncated_node_matrix(model, X, max_depth):
+    # Column d holds the node each row ends in when the tree is cut off at depth d.
+    # The decision path lists a row's nodes from the root down, so column d is simply the
+    # d-th node on the path (or the leaf, when the path is shorter than d).
+    paths = model.decision_path(X).sorted_indices()
+    path_lengths = np.diff(paths.indptr)
+    positions = paths.indptr[:-1, None] + np.minimum(np.arange(max_depth + 1)[None, :], path_lengths[:, None] - 1)
+    return paths.indices[positions]
+
+
+def truncated_tree(model, depths, max_depth):
+    # Turning every node at the cut-off depth into a leaf predicts exactly like the full tree cut off at that
+    # depth. It is close to, but not always the same as, a fresh fit with that max_depth, because tied splits
+    # can be broken differently. The nodes below the cut stay in tree_ without any row reaching them, so
+    # feature_importances_ and get_depth() still describe the full tree; use truncated_importances instead.
+    pruned = copy.deepcopy(model)
+    cut = depths >= max_depth
+    pruned.tree_.children_left[cut] = -1
+    pruned.tree_.children_right[cut] = -1
+    return pruned
+
+
+def truncated_importances(model, depths, max_depth):
+    # Impurity decrease of the splits above the cut only, normalized like sklearn's feature_importances_.
+    tree = model.tree_
+    split = (tree.children_left != -1) & (depths < max_depth)
+    left, right = tree.children_left[split], tree.children_right[split]
+    weighted = tree.weighted_n_node_samples * tree.impurity
+    decrease = weighted[split] - weighted[left] - weighted[right]
+    importances = np.bincount(tree.feature[split], weights=decrease, minlength=model.n_features_in_)
+    return importances / importances.sum() if importances.sum() > 0 else importances
+
+
+@st.cache_resource(show_spinner="Growing the full-depth tree...")
+def fit_depth_sweep(X_train, y_train, X_test, y_test):
+    # One full-depth tree is grown and cached; every shallower tree is a truncation of it.
+    # The fit time is returned with it, so cache hits still report what the real fit took.
+    model, fit_seconds = fit_stage(DecisionTreeClassifier(max_depth=TREE_MAX_DEPTH, random_state=42), X_train, y_train)
+
+    # Each node's predicted class is the majority class of the training rows that reached it.
+    node_classes = model.classes_[model.tree_.value[:, 0, :].argmax(axis=1)]
+
+    scores = {}
+    for name, X_part, y_part in [("Train", X_train, y_train), ("Test", X_test, y_test)]:
+        # A (rows x depths) matrix of predictions gives the accuracy at every depth in one comparison.
+        predictions = node_classes[truncated_node_matrix(model, X_part, TREE_MAX_DEPTH)]
+        scores[name] = (predictions == np.asarray(y_part)[:, None]).mean(axis=0)[1:]
+
+    return model, node_depths(model.tree_), scores, fit_seconds
+
+
+def show_depth_curve(scores, selected_depth):
+    st.markdown("### 📉 Depth Validation Curve")
+    st.caption(
+        "Accuracy of the tree cut off at every depth, all taken from one full-depth fit. "
+        "A growing gap between train and test accuracy is a sign of overfitting.")
+
+    depth_values = np.arange(1, TREE_MAX_DEPTH + 1)
+    fig, ax = plt.subplots(figsize=(8, 4))
+    ax.plot(depth_values, scores["Train"], marker="o", linewidth=2, label="Train accuracy")
+    ax.plot(depth_values, scores["Test"], marker="o", linewidth=2, color="#1C8510", label="Test accuracy")
+    ax.axvline(selected_depth, color="#ff4b4b", linestyle="--", label="Selected depth")
+    ax.set_xlabel("Max Depth")
+    ax.set_ylabel("Accuracy")
+    ax.set_xticks(depth_values)
+    ax.grid(True, alpha=0.3)
+    ax.legend()
+    fig.tight_layout()
+    st.pyplot(fig, use_container_width=True)
+    plt.close(fig)
+
+
+def logistic_model(penalty, C=1.0, warm_start=False):
+    # L1 needs the saga solver; both solvers support warm starts.
+    return LogisticRegression(
+        C=C,
+        l1_ratio=1.0 if penalty == "L1" else 0.0,
+        solver="saga" if penalty == "L1" else "lbfgs",
+        max_iter=1000 if penalty == "L2" else 2000,
+        warm_start=warm_start,
+        random_state=42
+    )
+
+
+@st.cache_resource(show_spinner="Fitting the C path...")
+def fit_logistic_path(X_train, y_train, penalty, random_state=42):
+    # A quarter of the training rows is held back to score every C on unseen data, like the regularization path.
+    # The test set is only used once the chosen C has been refitted on the full training set.
+    stratify = y_train if y_train.value_counts().min() >= 2 else None
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X_train, y_train, test_size=0.25, random_state=random_state, stratify=stratify)
+    model = logistic_model(penalty, warm_start=True)
+
+    # Moving from strong to weak regularization, each fit starts from the previous coefficients
+    # (warm_start=True), so later fits only need a few extra iterations.
+    scores = {"Train": [], "Validation": []}
+    nonzero = []
+    for C in C_GRID:
+        model.set_params(C=C)
+        model.fit(X_fit, y_fit)
+        scores["Train"].append(model.score(X_fit, y_fit))
+        scores["Validation"].append(model.score(X_val, y_val))
+        # A feature counts as used when any class gives it a non-zero coefficient.
+        nonzero.append(int(np.any(model.coef_ != 0, axis=0).sum()))
+
+    return scores, nonzero
+
+
+@st.cache_resource(show_spinner="Fitting the chosen C...", max_entries=len(C_GRID))
+def fit_logistic_c(X_train, y_train, penalty, C):
+    # The chosen C is refitted on the full training set once per data, penalty, and C, so moving the slider
+    # back to a C already tried is instant. Returns the model and its fit time, like train_model.
+    return fit_stage(logistic_model(penalty, C), X_train, y_train)
+
+
+def show_c_path(scores, nonzero, selected_c, penalty):
+    st.markdown("### 📉 C Validation Curve")
+    st.caption(
+        "Small C means strong regularization (simpler model); large C means weak regularization. "
+        "Every C value below was fitted once on 75% of the training rows, each starting from the previous solution, "
+        "and scored on the other 25%. The test set is not used to pick C.")
+
+    metric_col, nonzero_col = st.columns(2)
+
+    with metric_col:
+        fig, ax = plt.subplots(figsize=(6, 4))
+        ax.plot(C_GRID, scores["Train"], marker="o", markersize=4, linewidth=2, label="Train accuracy")
+        ax.plot(C_GRID, scores["Validation"], marker="o", markersize=4, linewidth=2, color="#1C8510",
+                label="Validation accuracy")
+        ax.axvline(selected_c, color="#ff4b4b", linestyle="--", label="Selected C")
+        ax.set_xscale("log")
+        ax.set_xlabel("C (inverse regularization strength)")
+        ax.set_ylabel("Accuracy")
+        ax.grid(True, alpha=0.3)
+        ax.legend()
+        fig.tight_layout()
+        st.pyplot(fig, use_container_width=True)
+        plt.close(fig)
+
+    with nonzero_col:
+        fig, ax = plt.subplots(figsize=(6, 4))
+        ax.step(C_GRID, nonzero, where="mid", linewidth=2)
+        ax.axvline(selected_c, color="#ff4b4b", linestyle="--")
+        ax.set_xscale("log")
+        ax.set_xlabel("C (inverse regularization strength)")
+        ax.set_ylabel("Non-zero Coefficients")
+        ax.grid(True, alpha=0.3)
+        fig.tight_layout()
+        st.pyplot(fig, use_container_width=True)
+        plt.close(fig)
+        if penalty == "L2":
+            st.caption("L2 shrinks coefficients but rarely sets them exactly to zero. Switch to L1 to see features drop out.")
+
+
+def stratified_order(y, stratify, random_state=42):
+    # Returns a row order where every prefix is a random subsample, so the stages are nested.
+    # For classification, rows are interleaved by class so every prefix keeps the class balance.
+    rng = np.random.default_rng(random_state)
+    shuffled = rng.permutation(len(y))
+    if not stratify:
+        return shuffled
+
+    codes = pd.factorize(np.asarray(y))[0]
+    by_class = shuffled[np.argsort(codes[shuffled], kind="stable")]
+    class_counts = np.bincount(codes)
+    class_starts = np.cumsum(class_counts) - class_counts
+
+    # A row's position within its class, as a share of that class, decides where it lands in the order.
+    rank_in_class = np.arange(len(y)) - class_starts[codes[by_class]]
+    share = (rank_in_class + 0.5) / class_counts[codes[by_class]]
+    return by_class[np.argsort(share, kind="stable")]
+
+
+def fit_stage(estimator, X_part, y_part):
+    start = time.perf_counter()
+    estimator.fit(X_part, y_part)
+    return estimator, time.perf_counter() - start
+
+
+def show_progress(stages, n_rows, metric):
+    # Redrawn after every finished stage so the newest estimate is always on screen.
+    stage_df = pd.DataFrame(stages).sort_values("Training Rows")
+    label = "Test Accuracy" if metric == "accuracy" else "Test R²"
+
+    latest = stage_df.iloc[-1]
+    if latest["Training Rows"] == n_rows:
+        st.success(f"✅ Full fit finished: {label} = {latest['Score']:.3f}")
+    else:
+        st.info(f"⏳ Preview from {latest['Training Rows']:,} rows: {label} ≈ {latest['Score']:.3f}. The full fit runs next.")
+
+    table_col, chart_col = st.columns(2)
+    with table_col:
+        st.dataframe(
+            stage_df.rename(columns={"Score": label}).round(4),
+            use_container_width=True,
+            hide_index=True
+        )
+    with chart_col:
+        # The learning curve comes for free from the stages: score against training rows.
+        fig, ax = plt.subplots(figsize=(6, 3.5))
+        ax.plot(stage_df["Training Rows"], stage_df["Score"], marker="o", linewidth=2, color="#1C8510")
+        ax.set_xlabel("Training Rows")
+        ax.set_ylabel(label)
+        ax.set_title("Learning Curve")
+        ax.grid(True, alpha=0.3)
+        fig.tight_layout()
+        st.pyplot(fig, use_container_width=True)
+        plt.close(fig)
+
+
+def fit_progressively(estimator, X_train, y_train, X_test, y_test, metric, stratify):
+    score = accuracy_score if metric == "accuracy" else r2_score
+    n_rows = len(X_train)
+    order = stratified_order(y_train, stratify)
+
+    # Very small stages are skipped because they say little about the final model.
+    sizes = sorted({int(np.ceil(fraction * n_rows)) for fraction in PROGRESSIVE_FRACTIONS})
+    sizes = [size for size in sizes if size >= min(50, n_rows)]
+
+    st.markdown("### ⏱️ Progressive Training")
+    st.caption("Small subsamples are fitted first and give a quick preview, then the full fit runs on its own.")
+    placeholder = st.empty()
+
+    stages = []
+    full_model, full_seconds = None, None
+    # Stages run one after another, smallest first, so the full fit never competes with a preview for the CPU.
+    for size in sizes:
+        rows = order[:size]
+        y_part = y_train.iloc[rows] if hasattr(y_train, "iloc") else y_train[rows]
+        try:
+            stage_model, seconds = fit_stage(clone(estimator), X_train.iloc[rows], y_part)
+        except ValueError:
+            # A small subsample can miss a rare class that the model requires; only the full fit must succeed.
+            if size == n_rows:
+                raise
+            continue
+
+        if size == n_rows:
+            full_model, full_seconds = stage_model, seconds
+        stages.append({
+            "Training Rows": size,
+            "Share of Rows": size / n_rows,
+            "Score": score(y_test, stage_model.predict(X_test)),
+            "Fit Seconds": seconds
+        })
+        with placeholder.container():
+            show_progress(stages, n_rows, metric)
+
+    return full_model, full_seconds
+
+
+def train_model(estimator, X_train, y_train, X_test, y_test, metric, progressive, stratify=False):
+    # Every branch trains through here so progressive training works the same way for each model.
+    # Returns the model and the seconds spent fitting it on the full training set, without any plotting.
+    if progressive:
+        return fit_progressively(estimator, X_train, y_train, X_test, y_test, metric, stratify)
+    return fit_stage(estimator, X_train, y_train)
+
+
+@st.cache_resource(show_spinner=False)
+def fit_preprocessor(_X_train, data_version, dataset_name, target, features, split_key, scale):
+    # Dummy coding and scaling are fitted on the training rows only, once per data version, feature set, and
+    # training-row hash. The cache is shared by every session, so the key must pin down the exact rows.
+    return build_preprocessor(_X_train, scale).fit(_X_train)
+
+
+def preprocess(X_train, X_test, target, scale):
+    # The split is identified by a hash of its training rows (labels and values), so a new test size,
+    # missing-value choice, or cleaning step refits, and no other session's rows can match it.
+    split_key = hashlib.sha1(pd.util.hash_pandas_object(X_train).values.tobytes()).hexdigest()
+    preprocessor = fit_preprocessor(
+        X_train, st.session_state["data_version"], st.session_state.get("dataset_name"),
+        target, tuple(X_train.columns), split_key, scale
+    )
+
+    # Standardizing numeric features is most useful for linear and logistic regression.
+    if scale:
+        st.info("📐 Numeric features were scaled using StandardScaler, fitted on the training rows only.")
+
+    # Reruns only pay for the transform.
+    return preprocessor.transform(X_train), preprocessor.transform(X_test)
+
+
+@st.cache_data(show_spinner=False)
+def cached_fingerprint(_df, data_version, dataset_name):
+    # Hashing the data once per version lets runs on the same data be grouped together.
+    # The hash matches the batch pipeline's, so app runs and batch runs on the same data line up.
+    return dataset_fingerprint(_df)
+
+
+def record_run(model_name, model_obj, target, problem_type, X_train, X_test, metrics,
+               fit_seconds, predict_seconds, **settings):
+    # Only simple parameter values are stored, so nested estimators and arrays are left out.
+    params = {
+        key: value for key, value in model_obj.get_params().items()
+        if value is None or isinstance(value, (bool, int, float, str))
+    }
+    params.update(settings)
+
+    df = st.session_state["dataframe"]
+    fingerprint = cached_fingerprint(df, st.session_state["data_version"], st.session_state.get("dataset_name"))
+    try:
+        save_run(make_run(
+            st.session_state.get("dataset_name") or "Uploaded dataset", fingerprint, target, problem_type, model_name,
+            list(X_train.columns), params, metrics, fit_seconds, predict_seconds, len(X_train), len(X_test)
+        ))
+    except sqlite3.Error as e:
+        # A locked or read-only store should never stop the model results from showing.
+        st.caption(f"⚠️ This run could not be saved to the experiment store: {e}")
 
 # -----------------------------------------------------------------------------
 # Main page content
@@ -295,6 +1397,8 @@ if "dataframe" not in st.session_state:
 
 # Pull the cleaned dataframe from session state.
 df = st.session_state["dataframe"]
+# Cached results are keyed on data_version, so data placed here without one still gets its own id.
+st.session_state.setdefault("data_version", uuid.uuid4().hex)
 
 st.markdown("### 🎯 Step 1: Choose a Target Variable")
 st.caption("The app will try to detect whether your problem is classification or regression.")
@@ -303,10 +1407,10 @@ st.caption("The app will try to detect whether your problem is classification or
 target = st.selectbox("Target variable", df.columns)
 target_series = df[target].dropna()
 
-# Simple detection rule:
+# Simple detection rule (shared with the batch pipeline):
 # non-numeric targets are treated as classification,
 # and numeric targets with only a few unique values are usually classification too.
-detected = "classification" if (not is_numeric_dtype(target_series) or target_series.nunique() <= 10) else "regression"
+detected = detect_problem_type(target_series).lower()
 
 st.info(f"Detected problem type: **{detected.title()}**")
 
@@ -325,9 +1429,12 @@ st.divider()
 st.markdown("### 💻 Step 2: Choose a Model")
 
 if problem_type == "Regression":
-    # Regression currently uses Linear Regression only.
-    model = "Linear Regression"
-    st.success("Selected model: **Linear Regression**")
+    # Regression offers ordinary least squares plus three regularized versions of it.
+    model = st.selectbox(
+        "Regression model",
+        ["Linear Regression", "Ridge Regression", "Lasso Regression", "ElasticNet Regression",
+         "Decision Tree Regressor", "Histogram Gradient Boosting Regressor"]
+    )
 else:
     # Classification gives the user several model choices.
     model = st.selectbox(
@@ -339,7 +1446,16 @@ else:
 with st.sidebar:
     st.subheader("⚙️ Model Options")
 
-    if model in ("Linear Regression", "Logistic Regression"):
+    if model in REGULARIZED_MODELS:
+        # Penalties treat every coefficient the same, so scaling is on by default for regularized models.
+        scale_data = st.toggle("Scale numeric features", value=True)
+        st.caption("Recommended for regularized regression so the penalty treats every feature equally.")
+
+        if model == "ElasticNet Regression":
+            # l1_ratio blends the Lasso (1.0) and Ridge (0.0) penalties.
+            l1_ratio = st.slider("L1 ratio", 0.05, 0.95, 0.5, step=0.05, key="elasticnet_l1_ratio",
+                                 help="Share of the penalty that comes from Lasso. The rest comes from Ridge.")
+    elif model in ("Linear Regression", "Logistic Regression"):
         # Scaling matters most for linear and logistic regression.
         scale_data = st.toggle("Scale numeric features")
         st.caption("Helpful for linear and logistic regression.")
@@ -348,6 +1464,13 @@ with st.sidebar:
         scale_data = False
         st.caption("Scaling is only used for Linear / Logistic Regression.")
 
+    # The Decision Tree Classifier already reuses one cached full-depth fit, so it has no progressive mode.
+    if model != "Decision Tree Classifier":
+        progressive = st.toggle("Progressive training", key="progressive_training")
+        st.caption("Shows quick results from small subsamples before the full model trains. Also draws a learning curve.")
+    else:
+        progressive = False
+
 st.divider()
 
 # -----------------------------------------------------------------------------
@@ -360,7 +1483,7 @@ if model == "Linear Regression":
     # Build the predictors and target based on user selections.
     # The prepare_model_data function handles the feature selection and dummy coding based on user inputs, 
     # returning the predictor matrix X and target vector y ready for modeling.
-    prepared = prepare_model_data(df, target, "linear")
+    prepared = prepare_model_data(df, target, "linear", classification=False)
 
 
     if prepared:
@@ -382,10 +1505,6 @@ if model == "Linear Regression":
         st.markdown("### ⚙️ Training Settings")
         test_size = get_test_size("linear_test_size")
 
-        # If the user chose to scale numeric features, we apply standard scaling to the predictor matrix X.
-        if scale_data:
-            X = apply_scaling(X, "linear")
-
         # Split the data into training and testing sets.
         X_train, X_test, y_train, y_test = train_test_split(
             X, y,
@@ -393,17 +1512,184 @@ if model == "Linear Regression":
             random_state=42
         )
 
+        # Dummy coding and scaling are learned from the training rows, then applied to both sets.
+        X_train, X_test = preprocess(X_train, X_test, target, scale_data)
+
         # Train the linear regression model.
-        model_obj = LinearRegression().fit(X_train, y_train)
+        model_obj, fit_seconds = train_model(LinearRegression(), X_train, y_train, X_test, y_test, "r2", progressive)
+
+        predict_start = time.perf_counter()
+        y_pred = model_obj.predict(X_test)
+        predict_seconds = time.perf_counter() - predict_start
 
         # Show evaluation results and coefficients.
         # show_regression_results calculates and displays key regression metrics like MSE, RMSE, and R²,
-        show_regression_results(y_test, model_obj.predict(X_test))
+        metrics = show_regression_results(y_test, y_pred)
+        record_run(model, model_obj, target, problem_type, X_train, X_test, metrics, fit_seconds, predict_seconds,
+                   test_size=test_size, scaled=scale_data)
         # while show_coefficients displays the coefficients for each feature, indicating their influence on the predictions.
-        show_coefficients(X.columns, model_obj.coef_, model_obj.intercept_)
+        show_coefficients(X_train.columns, model_obj.coef_, model_obj.intercept_)
+        show_permutation_importance(model_obj, X_test, y_test, "r2", "linear_permutation")
 
         st.success("✅ Linear Regression model trained successfully.")
 
+# -----------------------------------------------------------------------------
+# Ridge, Lasso, and ElasticNet Regression
+# -----------------------------------------------------------------------------
+elif model in REGULARIZED_MODELS:
+    penalty = REGULARIZED_MODELS[model]
+    st.markdown(f"## 🪢 {model}")
+    st.caption("Linear regression with a penalty that shrinks coefficients, which helps on wide or dummy-coded data.")
+
+    prepared = prepare_model_data(df, target, "regularized", classification=False)
+
+    if prepared:
+        X, y = prepared
+
+        st.markdown("### Missing Data Check")
+        mdf = pd.concat([X, y], axis=1)
+        mdf, should_stop = handle_missing(mdf, target, "regularized_missing")
+
+        if should_stop:
+            st.stop()
+
+        X, y = mdf.drop(columns=[target]), mdf[target]
+
+        st.markdown("### ⚙️ Training Settings")
+        test_size = get_test_size("regularized_test_size")
+
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y,
+            test_size=test_size,
+            random_state=42
+        )
+
+        # Dummy coding and scaling are learned from the training rows, then applied to both sets.
+        X_train, X_test = preprocess(X_train, X_test, target, scale_data)
+
+        # The whole path is computed once and cached, so choosing a different alpha needs no new path.
+        alphas, coefs, val_mse, fit_rows = compute_regularization_path(
+            X_train, y_train, penalty, l1_ratio if penalty == "elasticnet" else 0.5)
+
+        # The slider moves along the precomputed alphas and starts at the one with the lowest validation error.
+        alpha_index = st.select_slider(
+            "Penalty strength (alpha)",
+            options=list(range(len(alphas))),
+            value=int(np.argmin(val_mse)),
+            format_func=lambda i: f"{alphas[i]:.4g}",
+            key=f"{penalty}_alpha_index",
+            help="Larger values shrink the coefficients more. The default is the alpha with the lowest validation error."
+        )
+        alpha = float(alphas[alpha_index])
+        show_regularization_path(alphas, coefs, val_mse, list(X_train.columns), alpha)
+
+        # Fit the chosen strength on the same rows the path was fitted on, so the model is the one the
+        # validation curve scored. Refitting on more rows would change how strong the same alpha is.
+        X_fit, y_fit = X_train.iloc[fit_rows], y_train.iloc[fit_rows]
+        if penalty == "ridge":
+            model_obj = Ridge(alpha=alpha)
+        elif penalty == "lasso":
+            model_obj = Lasso(alpha=alpha, max_iter=10000)
+        else:
+            model_obj = ElasticNet(alpha=alpha, l1_ratio=l1_ratio, max_iter=10000)
+        model_obj, fit_seconds = train_model(model_obj, X_fit, y_fit, X_test, y_test, "r2", progressive)
+
+        predict_start = time.perf_counter()
+        y_pred = model_obj.predict(X_test)
+        predict_seconds = time.perf_counter() - predict_start
+
+        metrics = show_regression_results(y_test, y_pred)
+        record_run(model, model_obj, target, problem_type, X_fit, X_test, metrics, fit_seconds, predict_seconds,
+                   test_size=test_size, scaled=scale_data)
+        show_coefficients(X_train.columns, model_obj.coef_, model_obj.intercept_)
+        st.caption(f"{int(np.sum(model_obj.coef_ != 0))} of {len(model_obj.coef_)} coefficients are non-zero at alpha = {alpha:.4g}.")
+        show_permutation_importance(model_obj, X_test, y_test, "r2", "regularized_permutation")
+
+        st.success(f"✅ {model} model trained successfully.")
+
+# -----------------------------------------------------------------------------
+# Decision Tree and Histogram Gradient Boosting Regressors
+# -----------------------------------------------------------------------------
+elif model in ("Decision Tree Regressor", "Histogram Gradient Boosting Regressor"):
+    is_boosting = model == "Histogram Gradient Boosting Regressor"
+    key_prefix = "hgb_reg" if is_boosting else "tree_reg"
+
+    if is_boosting:
+        st.markdown("## 🚀 Histogram Gradient Boosting Regressor")
+        st.caption("Fast boosted trees for large numeric targets. Features are binned into histograms and training uses every CPU core.")
+    else:
+        st.markdown("## 🌳 Decision Tree Regressor")
+        st.caption("Predicts numeric outcomes with branching rules, so it can capture nonlinear patterns.")
+
+    prepared = prepare_model_data(df, target, key_prefix, classification=False)
+
+    if prepared:
+        X, y = prepared
+
+        # Both models route missing predictor values down a learned branch, so those rows are kept.
+        # Rows without a target value still cannot be used for training or scoring.
+        missing = int(X.isnull().any(axis=1).sum())
+        if missing:
+            st.info(f"ℹ️ {missing} rows have missing predictor values. This model handles them natively, so they are kept.")
+
+        has_target = y.notna()
+        if not has_target.all():
+            st.info(f"Removed {int((~has_target).sum())} rows with a missing target value for this run.")
+            X, y = X[has_target], y[has_target]
+
+        st.markdown("### ⚙️ Training Settings")
+        test_size = get_test_size(f"{key_prefix}_test_size")
+
+        if is_boosting:
+            # These sliders let the user experiment with the size and pace of the boosting process.
+            max_iter = st.slider("🌲 Number of boosting iterations", 50, 500, 200, step=25, key="hgb_reg_iterations")
+            learning_rate = st.slider("🐢 Learning rate", 0.01, 0.50, 0.10, step=0.01, key="hgb_reg_learning_rate")
+            max_leaf_nodes = st.slider("🍃 Max leaves per tree", 8, 128, 31, key="hgb_reg_leaves")
+        else:
+            max_depth = st.slider("🌲 Max depth", 1, 20, 5, key="tree_reg_depth")
+            min_samples_leaf = st.slider("🍃 Min rows per leaf", 1, 50, 5, key="tree_reg_min_leaf")
+
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y,
+            test_size=test_size,
+            random_state=42
+        )
+
+        # Dummy coding and scaling are learned from the training rows, then applied to both sets.
+        X_train, X_test = preprocess(X_train, X_test, target, scale_data)
+
+        if is_boosting:
+            # early_stopping=False keeps the number of iterations exactly what the user chose.
+            model_obj = HistGradientBoostingRegressor(
+                max_iter=max_iter,
+                learning_rate=learning_rate,
+                max_leaf_nodes=max_leaf_nodes,
+                early_stopping=False,
+                random_state=42
+            )
+        else:
+            model_obj = DecisionTreeRegressor(
+                max_depth=max_depth,
+                min_samples_leaf=min_samples_leaf,
+                random_state=42
+            )
+        model_obj, fit_seconds = train_model(model_obj, X_train, y_train, X_test, y_test, "r2", progressive)
+
+        predict_start = time.perf_counter()
+        y_pred = model_obj.predict(X_test)
+        predict_seconds = time.perf_counter() - predict_start
+
+        metrics = show_regression_results(y_test, y_pred)
+        record_run(model, model_obj, target, problem_type, X_train, X_test, metrics, fit_seconds, predict_seconds,
+                   test_size=test_size)
+
+        # Histogram boosting has no built-in importances, so permutation importance covers it.
+        if not is_boosting:
+            show_importances(X_train.columns, model_obj.feature_importances_)
+        show_permutation_importance(model_obj, X_test, y_test, "r2", f"{key_prefix}_permutation")
+
+        st.success(f"✅ {model} model trained successfully.")
+
 # -----------------------------------------------------------------------------
 # Logistic Regression
 # -----------------------------------------------------------------------------
@@ -414,7 +1700,7 @@ elif model == "Logistic Regression":
     # Build the predictors and target based on user selections.
     # The prepare_model_data function handles the feature selection and dummy coding based on user inputs, 
     # returning the predictor matrix X and target vector y ready for modeling.
-    prepared = prepare_model_data(df, target, "logistic")
+    prepared = prepare_model_data(df, target, "logistic", classification=True)
 
     if prepared:
         X, y = prepared
@@ -436,9 +1722,6 @@ elif model == "Logistic Regression":
         st.markdown("### ⚙️ Training Settings")
         test_size = get_test_size("logistic_test_size")
 
-        if scale_data:
-            X = apply_scaling(X, "logistic")
-
         # stratify=y keeps the class balance similar in train and test sets.
         X_train, X_test, y_train, y_test = train_test_split(
             X, y,
@@ -447,28 +1730,67 @@ elif model == "Logistic Regression":
             stratify=y
         )
 
-        # Train the logistic regression model.
-        # max_iter=1000 allows more iterations for convergence, which can be helpful for complex datasets.
-        model_obj = LogisticRegression(max_iter=1000).fit(X_train, y_train)
+        # Dummy coding and scaling are learned from the training rows, then applied to both sets.
+        X_train, X_test = preprocess(X_train, X_test, target, scale_data)
+
+        # The C sweep fits a whole grid of regularization strengths once, then lets the user pick one.
+        sweep_c = st.toggle("🔁 Sweep regularization strength (C)", key="logistic_c_sweep",
+                            help="Fits a grid of C values with warm starts and shows how accuracy and sparsity change.")
+
+        if sweep_c:
+            penalty = st.radio("Penalty", ["L2", "L1"], horizontal=True, key="logistic_penalty",
+                               help="L1 can set coefficients exactly to zero, which removes features from the model.")
+            path_scores, path_nonzero = fit_logistic_path(X_train, y_train, penalty)
+
+            # The slider moves along the cached path and starts at the C with the best validation accuracy.
+            c_index = st.select_slider(
+                "C value",
+                options=list(range(len(C_GRID))),
+                value=int(np.argmax(path_scores["Validation"])),
+                format_func=lambda i: f"{C_GRID[i]:.4g}",
+                key="logistic_c_index",
+                help="The default is the C with the highest validation accuracy."
+            )
+            show_c_path(path_scores, path_nonzero, C_GRID[c_index], penalty)
+
+            # Fit the chosen C on the full training set; the test set then scores it for the first time.
+            # Progressive training shows its preview stages on every fit, so only the plain refit is cached.
+            if progressive:
+                model_obj, fit_seconds = train_model(logistic_model(penalty, C_GRID[c_index]), X_train, y_train,
+                                                     X_test, y_test, "accuracy", progressive, stratify=True)
+            else:
+                model_obj, fit_seconds = fit_logistic_c(X_train, y_train, penalty, C_GRID[c_index])
+        else:
+            # Train the logistic regression model.
+            # max_iter=1000 allows more iterations for convergence, which can be helpful for complex datasets.
+            model_obj, fit_seconds = train_model(LogisticRegression(max_iter=1000), X_train, y_train, X_test, y_test,
+                                                 "accuracy", progressive, stratify=True)
 
+        predict_start = time.perf_counter()
         y_pred = model_obj.predict(X_test)
+        predict_seconds = time.perf_counter() - predict_start
 
         # For binary classification, probabilities are used to draw the ROC curve.
-        y_score = model_obj.predict_proba(X_test)[:, 1] if y.nunique() == 2 else None
-        show_classification_results(y_test, y_pred, y_score)
+        # The full probability matrix drives the one-vs-rest curves for multiclass targets.
+        y_proba = model_obj.predict_proba(X_test)
+        y_score = y_proba[:, 1] if y.nunique() == 2 else None
+        metrics = show_classification_results(y_test, y_pred, y_score, y_proba, model_obj.classes_)
+        record_run(model, model_obj, target, problem_type, X_train, X_test, metrics, fit_seconds, predict_seconds,
+                   test_size=test_size, scaled=scale_data, c_sweep=sweep_c)
 
         # Binary logistic regression has one coefficient row.
         # Multiclass logistic regression has one row per class, so this shows averages.
         if len(model_obj.coef_) == 1:
-            show_coefficients(X.columns, model_obj.coef_[0], model_obj.intercept_[0])
+            show_coefficients(X_train.columns, model_obj.coef_[0], model_obj.intercept_[0])
         else:
-            avg = pd.DataFrame(model_obj.coef_, columns=X.columns).abs().mean()
+            avg = pd.DataFrame(model_obj.coef_, columns=X_train.columns).abs().mean()
             show_coefficients(
-                X.columns,
+                X_train.columns,
                 avg.values,
                 pd.Series(model_obj.intercept_).abs().mean(),
                 "Average Feature Coefficients"
             )
+        show_permutation_importance(model_obj, X_test, y_test, "accuracy", "logistic_permutation")
 
         st.success("✅ Logistic Regression model trained successfully.")
 
@@ -480,7 +1802,7 @@ elif model == "Decision Tree Classifier":
     st.caption("Useful for interpretable classification models with branching logic.")
 
     # Build the predictors and target based on user selections.
-    prepared = prepare_model_data(df, target, "tree_clf")
+    prepared = prepare_model_data(df, target, "tree_clf", classification=True)
 
     if prepared:
         X, y = prepared
@@ -504,7 +1826,7 @@ elif model == "Decision Tree Classifier":
         test_size = get_test_size("tree_clf_test_size")
 
         # max_depth controls how complex the tree is allowed to become.
-        max_depth = st.slider("🌲 Max depth", 1, 15, 3, key="tree_clf_depth")
+        max_depth = st.slider("🌲 Max depth", 1, TREE_MAX_DEPTH, 3, key="tree_clf_depth")
 
         X_train, X_test, y_train, y_test = train_test_split(
             X, y,
@@ -513,13 +1835,29 @@ elif model == "Decision Tree Classifier":
             stratify=y
         )
 
-        # Train the decision tree classifier.
-        model_obj = DecisionTreeClassifier(max_depth=max_depth, random_state=42).fit(X_train, y_train)
+        # Dummy coding and scaling are learned from the training rows, then applied to both sets.
+        X_train, X_test = preprocess(X_train, X_test, target, scale_data)
 
+        # Grow the full-depth tree once (cached); every depth on the slider is already evaluated.
+        # The recorded fit time is the full-depth fit; truncating it for the slider is not a fit.
+        full_tree, depths, depth_scores, fit_seconds = fit_depth_sweep(X_train, y_train, X_test, y_test)
+        show_depth_curve(depth_scores, max_depth)
+
+        # The selected depth is a truncated copy of the full tree, so moving the slider never refits.
+        model_obj = truncated_tree(full_tree, depths, max_depth)
+
+        predict_start = time.perf_counter()
         y_pred = model_obj.predict(X_test)
-        y_score = model_obj.predict_proba(X_test)[:, 1] if y.nunique() == 2 else None
-        show_classification_results(y_test, y_pred, y_score)
-        show_importances(X.columns, model_obj.feature_importances_)
+        predict_seconds = time.perf_counter() - predict_start
+
+        y_proba = model_obj.predict_proba(X_test)
+        y_score = y_proba[:, 1] if y.nunique() == 2 else None
+        metrics = show_classification_results(y_test, y_pred, y_score, y_proba, model_obj.classes_)
+        # The truncated copy keeps the full tree's parameters, so the chosen depth is recorded separately.
+        record_run(model, model_obj, target, problem_type, X_train, X_test, metrics, fit_seconds, predict_seconds,
+                   test_size=test_size, max_depth=max_depth)
+        show_importances(X_train.columns, truncated_importances(full_tree, depths, max_depth))
+        show_permutation_importance(model_obj, X_test, y_test, "accuracy", "tree_clf_permutation")
 
         st.success("✅ Decision Tree model trained successfully.")
 
@@ -531,7 +1869,7 @@ elif model == "XGBoost Classifier":
     st.caption("A powerful boosting model for classification tasks.")
 
     # Build the predictors and target based on user selections.
-    prepared = prepare_model_data(df, target, "xgb_clf")
+    prepared = prepare_model_data(df, target, "xgb_clf", classification=True)
 
     if prepared:
         X, y = prepared
@@ -565,20 +1903,32 @@ elif model == "XGBoost Classifier":
             stratify=y_enc
         )
 
+        # Dummy coding and scaling are learned from the training rows, then applied to both sets.
+        X_train, X_test = preprocess(X_train, X_test, target, scale_data)
+
         # Train the XGBoost classifier.
         model_obj = XGBClassifier(
             n_estimators=n_estimators,
             max_depth=max_depth,
             random_state=42
-        ).fit(X_train, y_train)
+        )
+        model_obj, fit_seconds = train_model(model_obj, X_train, y_train, X_test, y_test, "accuracy", progressive, stratify=True)
 
+        predict_start = time.perf_counter()
         y_pred = model_obj.predict(X_test)
+        predict_seconds = time.perf_counter() - predict_start
 
         # Convert the encoded predictions back to the original class names for display.
         y_pred_labels = pd.Series(le.inverse_transform(y_pred))
         y_test_labels = pd.Series(le.inverse_transform(y_test))
-        y_score = model_obj.predict_proba(X_test)[:, 1] if len(le.classes_) == 2 else None
-        show_classification_results(y_test_labels, y_pred_labels, y_score)
-        show_importances(X.columns, model_obj.feature_importances_)
+        # Probability columns follow the encoded class order, which le.classes_ maps back to names.
+        y_proba = model_obj.predict_proba(X_test)
+        y_score = y_proba[:, 1] if len(le.classes_) == 2 else None
+        metrics = show_classification_results(y_test_labels, y_pred_labels, y_score, y_proba, le.classes_)
+        record_run(model, model_obj, target, problem_type, X_train, X_test, metrics, fit_seconds, predict_seconds,
+                   test_size=test_size)
+        show_importances(X_train.columns, model_obj.feature_importances_)
+        show_permutation_importance(model_obj, X_test, y_test, "accuracy", "xgb_clf_permutation")
+        show_xgb_contributions(model_obj, X_test, [str(label) for label in le.classes_])
 
         st.success("✅ XGBoost model trained successfully.")
@@ -0,0 +1,123 @@
+import json
+import pandas as pd
+import streamlit as st
+import matplotlib.pyplot as plt
+
+from experiment_store import load_filter_options, load_runs
+
+# Columns the user can sort the run table by, mapped to their names in the store.
+SORT_COLUMNS = {
+    "Time": "created_at",
+    "Score (Accuracy / R²)": "score",
+    "Fit time": "fit_seconds",
+    "Model": "model",
+    "Training rows": "train_rows"
+}
+
+# -----------------------------------------------------------------------------
+# Helper functions
+# -----------------------------------------------------------------------------
+
+def expand_runs(runs):
+    # Metrics and parameters are stored as JSON, so they are unpacked into columns for display.
+    metrics = pd.DataFrame([json.loads(value) for value in runs["metrics"]], index=runs.index)
+    table = pd.DataFrame({
+        "Run": runs["id"],
+        "Time": runs["created_at"],
+        "Dataset": runs["dataset_name"],
+        "Target": runs["target"],
+        "Model": runs["model"],
+        "Features": [len(json.loads(value)) for value in runs["features"]],
+        "Training rows": runs["train_rows"],
+        "Fit (s)": runs["fit_seconds"].round(3),
+        "Predict (s)": runs["predict_seconds"].round(4)
+    })
+    return pd.concat([table, metrics.round(4)], axis=1)
+
+
+def show_comparison(selected):
+    # Metrics side by side, one column per run.
+    metrics = pd.DataFrame(
+        {f"Run {run_id}": json.loads(value) for run_id, value in zip(selected["id"], selected["metrics"])}
+    )
+    st.dataframe(metrics.round(4), use_container_width=True)
+
+    fig, ax = plt.subplots(figsize=(7, 3.5))
+    metrics.plot.bar(ax=ax, rot=0, width=0.8)
+    ax.set_ylabel("Value")
+    ax.set_title("Metrics by Run")
+    ax.grid(True, axis="y", alpha=0.3)
+    ax.legend(fontsize=8)
+    st.pyplot(fig, use_container_width=True)
+    plt.close(fig)
+
+    # Parameters that differ between the runs are usually what explains the metric differences.
+    params = pd.DataFrame(
+        {f"Run {run_id}": json.loads(value) for run_id, value in zip(selected["id"], selected["params"])}
+    ).map(str)
+    differing = params[params.nunique(axis=1) > 1]
+    st.markdown("#### Settings That Differ")
+    if differing.empty:
+        st.caption("The selected runs used the same settings.")
+    else:
+        st.dataframe(differing, use_container_width=True)
+
+# -----------------------------------------------------------------------------
+# Main page content
+# -----------------------------------------------------------------------------
+
+st.title("🗂️ Experiment Runs")
+st.markdown("Every model trained on the Predictions page is saved here so you can sort and compare runs.")
+
+options = load_filter_options()
+
+if options.empty:
+    st.info("No runs saved yet. Train a model on the **Predictions** page first.")
+    st.stop()
+
+# Sidebar filters narrow the query before it reaches the store.
+with st.sidebar:
+    st.subheader("🔎 Filter Runs")
+
+    datasets = options.drop_duplicates("dataset_fingerprint")
+    labels = {
+        row.dataset_fingerprint: f"{row.dataset_name} ({row.dataset_fingerprint[:8]})"
+        for row in datasets.itertuples()
+    }
+    dataset = st.selectbox("Dataset", [None] + list(labels), format_func=lambda fp: "All datasets" if fp is None else labels[fp])
+
+    scoped = options if dataset is None else options[options["dataset_fingerprint"] == dataset]
+    target = st.selectbox("Target", [None] + sorted(scoped["target"].unique()),
+                          format_func=lambda t: "All targets" if t is None else t)
+
+    scoped = scoped if target is None else scoped[scoped["target"] == target]
+    models = st.multiselect("Models", sorted(scoped["model"].unique()))
+
+    sort_label = st.selectbox("Sort by", list(SORT_COLUMNS))
+    descending = st.toggle("Highest / newest first", value=True)
+    limit = st.slider("Max runs", 10, 1000, 200, step=10)
+
+runs = load_runs(dataset, target, models, SORT_COLUMNS[sort_label], descending, limit)
+
+if runs.empty:
+    st.info("No runs match these filters.")
+    st.stop()
+
+st.markdown("### 📋 Runs")
+st.caption("Scores are accuracy for classification and R² for regression. Repeating the same run updates its row.")
+st.dataframe(expand_runs(runs), use_container_width=True, hide_index=True)
+
+st.divider()
+
+st.markdown("### ⚖️ Compare Runs")
+selected_ids = st.multiselect("Choose runs to compare", runs["id"].tolist(), max_selections=6,
+                              format_func=lambda i: f"Run {i} · {runs.loc[runs['id'] == i, 'model'].iloc[0]}")
+
+if len(selected_ids) < 2:
+    st.caption("Pick at least two runs to see them side by side.")
+else:
+    selected = runs[runs["id"].isin(selected_ids)]
+    # Accuracy and R² are not comparable, so mixed problem types are shown but flagged.
+    if selected["problem_type"].nunique() > 1:
+        st.warning("The selected runs mix classification and regression, so their metrics are not comparable.")
+    show_comparison(selected)
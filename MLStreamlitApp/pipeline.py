@@ -0,0 +1,322 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.linear_model import ElasticNet, Lasso, LinearRegression, LogisticRegression, Ridge
+from sklearn.metrics import accuracy_score, f1_score, mean_squared_error, precision_score, recall_score, root_mean_squared_error, r2_score
+from sklearn.model_selection import train_test_split
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import LabelEncoder, OneHotEncoder, StandardScaler
+from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
+from xgboost import XGBClassifier
+
+from experiment_store import flush, make_run, save_run
+
+# Headless versions of the Predictions page models, with the same defaults as the page widgets.
+# Each entry is (problem type, estimator class, default parameters).
+MODELS = {
+    "Linear Regression": ("Regression", LinearRegression, {}),
+    "Ridge Regression": ("Regression", Ridge, {"alpha": 1.0}),
+    "Lasso Regression": ("Regression", Lasso, {"alpha": 1.0, "max_iter": 10000}),
+    "ElasticNet Regression": ("Regression", ElasticNet, {"alpha": 1.0, "l1_ratio": 0.5, "max_iter": 10000}),
+    "Decision Tree Regressor": ("Regression", DecisionTreeRegressor,
+                                {"max_depth": 5, "min_samples_leaf": 5, "random_state": 42}),
+    "Histogram Gradient Boosting Regressor": ("Regression", HistGradientBoostingRegressor,
+                                              {"max_iter": 200, "learning_rate": 0.1, "max_leaf_nodes": 31,
+                                               "early_stopping": False, "random_state": 42}),
+    "Logistic Regression": ("Classification", LogisticRegression, {"max_iter": 1000}),
+    "Decision Tree Classifier": ("Classification", DecisionTreeClassifier, {"max_depth": 3, "random_state": 42}),
+    "XGBoost Classifier": ("Classification", XGBClassifier, {"n_estimators": 100, "max_depth": 3, "random_state": 42})
+}
+
+# These models route missing predictor values down a learned branch, so rows with gaps are kept.
+NATIVE_MISSING_MODELS = {"Decision Tree Regressor", "Histogram Gradient Boosting Regressor", "XGBoost Classifier"}
+
+# The linear models are the ones where scaling changes the fit, matching the page's scaling toggle.
+SCALABLE_MODELS = {"Linear Regression", "Ridge Regression", "Lasso Regression", "ElasticNet Regression",
+                   "Logistic Regression"}
+
+# Finished results are stored here as one JSON file per experiment.
+CACHE_DIR = Path(__file__).parent / ".pipeline_cache"
+
+
+def detect_problem_type(target_series):
+    # Same rule as the Predictions page:
+    # non-numeric targets and numeric targets with only a few unique values are classification.
+    target_series = target_series.dropna()
+    if not is_numeric_dtype(target_series) or target_series.nunique() <= 10:
+        return "Classification"
+    return "Regression"
+
+
+def dataset_fingerprint(df):
+    # A content hash, so the same data gets the same fingerprint in the app and in batch runs.
+    return hashlib.sha1(pd.util.hash_pandas_object(df, index=True).values.tobytes()).hexdigest()
+
+
+def regression_metrics(y_test, y_pred):
+    return {
+        "MSE": mean_squared_error(y_test, y_pred),
+        "RMSE": root_mean_squared_error(y_test, y_pred),
+        "R²": r2_score(y_test, y_pred)
+    }
+
+
+def classification_metrics(y_test, y_pred):
+    # Binary targets score the last sorted class as positive; multiclass targets use weighted averages.
+    unique_classes = sorted(pd.Series(y_test).unique())
+    if len(unique_classes) == 2:
+        averaging = {"pos_label": unique_classes[-1]}
+    else:
+        averaging = {"average": "weighted"}
+
+    return {
+        "Accuracy": accuracy_score(y_test, y_pred),
+        "Precision": precision_score(y_test, y_pred, zero_division=0, **averaging),
+        "Recall": recall_score(y_test, y_pred, zero_division=0, **averaging),
+        "F1 Score": f1_score(y_test, y_pred, zero_division=0, **averaging)
+    }
+
+
+def build_preprocessor(X, scale=False):
+    """Return an unfitted transformer for the raw predictor columns.
+
+    Text and category columns become 0/1 dummy columns (the first category is the baseline,
+    like pd.get_dummies(drop_first=True)), and numeric columns are optionally standardized.
+    Fitting it on the training rows only keeps test rows from leaking into the scaling
+    statistics or the category list.
+    """
+    numeric = [col for col in X.columns if is_numeric_dtype(X[col]) and not is_bool_dtype(X[col])]
+    categorical = [col for col in X.columns if col not in numeric]
+
+    transformers = []
+    if numeric:
+        transformers.append(("numeric", StandardScaler() if scale else "passthrough", numeric))
+    if categorical:
+        # Categories that only show up in the test rows are encoded as all zeros, like the baseline.
+        transformers.append(("dummies", OneHotEncoder(drop="first", handle_unknown="ignore", sparse_output=False),
+                             categorical))
+
+    # Plain column names ("sex_male") and DataFrame output keep the coefficient and importance tables readable.
+    return ColumnTransformer(transformers, verbose_feature_names_out=False).set_output(transform="pandas")
+
+
+def prepare_data(df, target, features=None, dummy_code=False, keep_missing=False):
+    # Without an explicit list, every other column is a predictor (numeric ones only unless dummy coding).
+    if features is None:
+        features = [col for col in df.columns if col != target]
+        if not dummy_code:
+            features = df[features].select_dtypes(include=["number"]).columns.tolist()
+    else:
+        features = [col for col in features if col != target]
+    if not features:
+        raise ValueError(f"No usable predictor columns for target '{target}'.")
+
+    # Dummy coding happens after the split (see build_preprocessor), so only raw columns are returned here.
+    X = df[list(features)].copy()
+    y = df[target].copy()
+
+    # The page asks what to do with missing rows; headless runs drop them, like the "drop rows" choice.
+    keep = y.notna() if keep_missing else X.notna().all(axis=1) & y.notna()
+    return X[keep], y[keep]
+
+
+def run_experiment(df, target, model, features=None, params=None, test_size=0.2, scale=False,
+                   dummy_code=False, random_state=42):
+    if model not in MODELS:
+        raise ValueError(f"Unknown model '{model}'. Choose from: {', '.join(MODELS)}.")
+    problem_type, estimator_class, defaults = MODELS[model]
+
+    X, y = prepare_data(df, target, features, dummy_code, keep_missing=model in NATIVE_MISSING_MODELS)
+    classification = problem_type == "Classification"
+    if classification and y.nunique() < 2:
+        raise ValueError(f"{model} needs at least two target classes.")
+
+    # XGBoost expects numeric class labels, so text labels are encoded and decoded around the fit.
+    encoder = LabelEncoder().fit(y) if model == "XGBoost Classifier" else None
+    y_fit = pd.Series(encoder.transform(y), index=y.index) if encoder is not None else y
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y_fit,
+        test_size=test_size,
+        random_state=random_state,
+        stratify=y_fit if classification else None
+    )
+
+    # Preprocessing only learns from the training rows.
+    preprocessor = build_preprocessor(X_train, scale and model in SCALABLE_MODELS).fit(X_train)
+    X_train, X_test = preprocessor.transform(X_train), preprocessor.transform(X_test)
+
+    estimator = estimator_class(**{**defaults, **(params or {})})
+
+    fit_start = time.perf_counter()
+    estimator.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - fit_start
+
+    predict_start = time.perf_counter()
+    y_pred = estimator.predict(X_test)
+    predict_seconds = time.perf_counter() - predict_start
+
+    if encoder is not None:
+        y_test, y_pred = encoder.inverse_transform(y_test), encoder.inverse_transform(y_pred)
+    metrics = classification_metrics(y_test, y_pred) if classification else regression_metrics(y_test, y_pred)
+
+    return {
+        "target": target,
+        "model": model,
+        "problem_type": problem_type,
+        "features": list(X_train.columns),
+        "params": {**defaults, **(params or {}), "test_size": test_size, "scaled": bool(scale)},
+        "metrics": {key: float(value) for key, value in metrics.items()},
+        "fit_seconds": fit_seconds,
+        "predict_seconds": predict_seconds,
+        "train_rows": len(X_train),
+        "test_rows": len(X_test)
+    }
+
+
+# Each worker process receives the dataset once through the pool initializer, not once per task.
+_worker_df = None
+
+
+def _init_worker(df):
+    global _worker_df
+    _worker_df = df
+
+
+def _run_in_worker(spec):
+    try:
+        return run_experiment(_worker_df, **spec)
+    except Exception as e:
+        # A failing combination is reported in the results instead of stopping the whole batch.
+        return {"target": spec["target"], "model": spec["model"], "error": f"{type(e).__name__}: {e}"}
+
+
+def experiment_key(fingerprint, spec):
+    return hashlib.sha1(json.dumps([fingerprint, spec], sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def build_specs(df, targets=None, models=None, **options):
+    # Without a model list, each target is paired with every model that fits its detected problem type.
+    specs = []
+    for target in targets if targets is not None else list(df.columns):
+        problem_type = detect_problem_type(df[target])
+        candidates = models if models is not None else [m for m, (kind, _, _) in MODELS.items() if kind == problem_type]
+        for model in candidates:
+            specs.append({"target": target, "model": model, **options})
+    return specs
+
+
+def run_experiments(df, targets=None, models=None, max_workers=None, cache=True, record=False,
+                    dataset_name=None, progress=None, **options):
+    """Run every target/model combination over a process pool and return one row per run.
+
+    Finished experiments are cached on disk by dataset fingerprint and settings, so rerunning
+    a batch only trains the combinations that are new. Extra keyword arguments (features,
+    params, test_size, scale, dummy_code, random_state) are passed to every run_experiment call.
+    """
+    fingerprint = dataset_fingerprint(df)
+    specs = build_specs(df, targets, models, **options)
+    results = [None] * len(specs)
+
+    # Cached results are loaded first; only the misses go to the pool.
+    pending = []
+    for i, spec in enumerate(specs):
+        cache_file = CACHE_DIR / f"{experiment_key(fingerprint, spec)}.json"
+        if cache and cache_file.exists():
+            results[i] = {**json.loads(cache_file.read_text()), "cached": True}
+        else:
+            pending.append(i)
+
+    if pending:
+        CACHE_DIR.mkdir(exist_ok=True)
+        workers = min(max_workers or os.cpu_count() or 1, len(pending))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(df,)) as pool:
+            futures = {pool.submit(_run_in_worker, specs[i]): i for i in pending}
+            for done, future in enumerate(as_completed(futures), start=1):
+                i = futures[future]
+                result = future.result()
+                # Failures are not cached, so they are retried the next time the batch runs.
+                if "error" not in result:
+                    (CACHE_DIR / f"{experiment_key(fingerprint, specs[i])}.json").write_text(json.dumps(result))
+                results[i] = {**result, "cached": False}
+                if progress is not None:
+                    progress(done, len(pending), result)
+
+    # Successful runs can also be written to the experiment store for the Experiment Runs page.
+    if record:
+        for result in results:
+            if "error" not in result:
+                save_run(make_run(
+                    dataset_name or "Batch run", fingerprint, result["target"], result["problem_type"],
+                    result["model"], result["features"], result["params"], result["metrics"],
+                    result["fit_seconds"], result["predict_seconds"], result["train_rows"], result["test_rows"]
+                ))
+        flush()
+
+    # One flat row per run: metrics become columns, and the main score is first for easy sorting.
+    rows = []
+    for result in results:
+        row = {"target": result["target"], "model": result["model"]}
+        if "error" in result:
+            row["error"] = result["error"]
+        else:
+            metrics = result["metrics"]
+            row.update({
+                "problem_type": result["problem_type"],
+                "score": metrics.get("Accuracy", metrics.get("R²")),
+                **metrics,
+                "n_features": len(result["features"]),
+                "fit_seconds": result["fit_seconds"],
+                "cached": result["cached"]
+            })
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Predictions experiments in bulk without the app.")
+    parser.add_argument("csv", help="Path to the dataset CSV")
+    parser.add_argument("--targets", nargs="+", help="Target columns (default: every column)")
+    parser.add_argument("--models", nargs="+", choices=list(MODELS), help="Models (default: every model for each target's problem type)")
+    parser.add_argument("--features", nargs="+", help="Predictor columns (default: every other column)")
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--scale", action="store_true", help="Scale features for the linear models")
+    parser.add_argument("--dummy-code", action="store_true", help="Include categorical predictors as dummy columns")
+    parser.add_argument("--workers", type=int, help="Number of worker processes (default: every CPU core)")
+    parser.add_argument("--no-cache", action="store_true", help="Retrain every combination instead of reusing cached results")
+    parser.add_argument("--record", action="store_true", help="Save the runs to the experiment store")
+    parser.add_argument("--out", help="Write the results table to this CSV file")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv)
+    results = run_experiments(
+        df, args.targets, args.models,
+        max_workers=args.workers,
+        cache=not args.no_cache,
+        record=args.record,
+        dataset_name=Path(args.csv).name,
+        progress=lambda done, total, result: print(f"[{done}/{total}] {result['target']} · {result['model']}"),
+        features=args.features,
+        test_size=args.test_size,
+        scale=args.scale,
+        dummy_code=args.dummy_code
+    )
+
+    if args.out:
+        results.to_csv(args.out, index=False)
+    if "score" in results:
+        results = results.sort_values(["problem_type", "score"], ascending=[True, False], na_position="last")
+    with pd.option_context("display.width", 200, "display.max_rows", None):
+        print(results.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
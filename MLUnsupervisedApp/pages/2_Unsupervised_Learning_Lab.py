@@ -1,17 +1,604 @@
+import io
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
 from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
-from sklearn.cluster import AgglomerativeClustering
-from sklearn.cluster import KMeans
-from sklearn.metrics import silhouette_score
-from scipy.cluster.hierarchy import dendrogram, linkage
+from sklearn.decomposition import PCA, IncrementalPCA
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import pairwise_distances, pairwise_distances_argmin
+from scipy import stats
+from scipy.cluster.hierarchy import dendrogram, fcluster, linkage
+from threadpoolctl import threadpool_limits
 
 
 st.set_page_config(page_title="Unsupervised Learning Lab", page_icon="🧪", layout="wide")
 
+# Number of branches drawn at the top of the dendrogram, so the chart stays readable on large datasets.
+DENDROGRAM_LEAVES = 50
+
+# The shared distance matrix is kept as float32 and only built when it fits under this size.
+# Above it, distances are recomputed in chunks wherever they are needed. Its cache keeps only the two newest
+# matrices, since every cleaning step makes a new data version and old ones would otherwise stay in memory.
+DISTANCE_MEMORY_LIMIT_BYTES = 512 * 1024 ** 2
+# Distance blocks are processed this many cells at a time (rows in the block x all rows).
+DISTANCE_CHUNK_CELLS = 4_000_000
+
+# When the full distance matrix is over the limit, the cluster tree is built from a random sample of this many rows
+# and every other row joins the cluster with the nearest center.
+HIERARCHY_SAMPLE_ROWS = 10_000
+
+# Above this many rows, silhouette scores are estimated from repeated stratified samples instead of every pair.
+SILHOUETTE_EXACT_MAX_ROWS = 10_000
+SILHOUETTE_SAMPLE_SIZE = 2_000
+SILHOUETTE_REPEATS = 5
+# The exact-vs-sampled silhouette check scores a random subset of at most this many rows both ways.
+SILHOUETTE_CHECK_MIN_ROWS = 200
+SILHOUETTE_CHECK_MAX_ROWS = 20_000
+# The silhouette profile plot draws at most this many bars. When the scores are sampled, the profile is also
+# computed from one stratified sample of this many rows instead of every row.
+PROFILE_MAX_POINTS = 5_000
+
+# Confidence level of the band drawn around sampled silhouette estimates.
+CONFIDENCE_LEVEL = 0.95
+
+# Mini-batch K-Means updates the centers from this many rows at a time instead of the whole dataset.
+MINIBATCH_SIZE = 4_096
+# Reference fits for comparisons (standard or independent K-Means, exact PCA) run by default only up to this
+# many rows, since they are slow beyond that.
+COMPARE_MAX_ROWS = 100_000
+# A warm-started sweep tries this many draws for the new center at each k and keeps the best.
+WARM_START_RESTARTS = 3
+# Streamed CSV files are read this many rows at a time, so they never have to fit in memory.
+STREAM_CHUNK_ROWS = 100_000
+
+# PCA is computed once with this many components (or fewer features); every view slices what it needs.
+PCA_MAX_COMPONENTS = 10
+# PCA engines and the scikit-learn solver behind each one. The engine is picked from the data shape.
+PCA_SOLVERS = {"Covariance": "covariance_eigh", "Randomized": "randomized", "Full SVD": "full"}
+# Up to this many features, PCA goes through the small features-by-features covariance matrix.
+PCA_COVARIANCE_MAX_FEATURES = 500
+# Wider data larger than this is fed to IncrementalPCA in row chunks instead of being copied by an exact solver.
+PCA_MEMORY_LIMIT_BYTES = 512 * 1024 ** 2
+PCA_CHUNK_CELLS = 4_000_000
+
+# Download formats offered for result tables: file extension and MIME type for each.
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Compressed CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet")
+}
+
+
+# -----------------------------------------------------------------------------
+# Helper functions
+# -----------------------------------------------------------------------------
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def export_bytes(_results_df, result_key, file_format):
+    # The result key identifies the table (data version, features, settings), so the table itself is not hashed.
+    if file_format == "Parquet":
+        return _results_df.to_parquet(index=False)
+
+    buffer = io.BytesIO()
+    _results_df.to_csv(buffer, index=False, compression="gzip" if file_format == "Compressed CSV (gzip)" else None)
+    return buffer.getvalue()
+
+
+@st.cache_resource(show_spinner="Computing pairwise distances...", max_entries=2)
+def shared_distances(_X_array, data_key, metric="euclidean"):
+    # One float32 condensed distance matrix per data and metric, reused by silhouettes and linkage.
+    n_rows = len(_X_array)
+    n_pairs = n_rows * (n_rows - 1) // 2
+    if n_pairs * 4 > DISTANCE_MEMORY_LIMIT_BYTES:
+        return None
+
+    distances = np.empty(n_pairs, dtype=np.float32)
+    X32 = np.asarray(_X_array, dtype=np.float32)
+    step = max(1, DISTANCE_CHUNK_CELLS // n_rows)
+    for start in range(0, n_rows, step):
+        stop = min(start + step, n_rows)
+        block = pairwise_distances(X32[start:stop], X32[start:], metric=metric)
+        # Row i keeps only the distances to later rows, which is its slice of the condensed vector.
+        for offset, row in enumerate(range(start, stop)):
+            position = n_rows * row - row * (row + 1) // 2
+            distances[position:position + n_rows - row - 1] = block[offset, offset + 1:]
+    return distances
+
+
+def square_rows(distances, n_rows, start, stop):
+    # Rebuilds rows start..stop-1 of the full distance matrix from contiguous slices of the condensed vector.
+    block = np.zeros((stop - start, n_rows), dtype=distances.dtype)
+    for row in range(stop):
+        position = n_rows * row - row * (row + 1) // 2
+        if row < start:
+            # An earlier row holds its distances to this block's rows, which fill one block column.
+            block[:, row] = distances[position + start - row - 1:position + stop - row - 1]
+        else:
+            # A row in the block holds its distances to every later row.
+            block[row - start, row + 1:] = distances[position:position + n_rows - row - 1]
+
+    # Inside the block only the upper triangle was filled, so it is mirrored to complete it.
+    inner = block[:, start:stop]
+    inner += inner.T
+    return block
+
+
+def distance_blocks(X_array, distances, metric="euclidean"):
+    # Yields (rows, block of distances from those rows to every row), from the shared matrix when there is one.
+    n_rows = len(X_array)
+    step = max(1, DISTANCE_CHUNK_CELLS // n_rows)
+    for start in range(0, n_rows, step):
+        stop = min(start + step, n_rows)
+        if distances is None:
+            block = pairwise_distances(X_array[start:stop], X_array, metric=metric)
+        else:
+            block = square_rows(distances, n_rows, start, stop)
+        yield np.arange(start, stop), block
+
+
+def silhouette_by_row(X_array, labels_by_k, distances=None):
+    """Silhouette value of every row for each column of labels_by_k, from one pass over the distances.
+
+    Each block of distance rows is multiplied by a 0/1 cluster membership matrix that covers every
+    clustering, which gives each row's total distance to every cluster of every clustering at once.
+    Only one block is held at a time, so memory stays bounded by DISTANCE_CHUNK_CELLS.
+    """
+    n_rows, n_clusterings = labels_by_k.shape
+    # Gapped labels would leave empty clusters, whose mean distance is 0 / 0.
+    labels_by_k = compact_labels(labels_by_k)
+    group_counts = labels_by_k.max(axis=0) + 1
+    offsets = np.concatenate([[0], np.cumsum(group_counts)[:-1]])
+    group_ids = labels_by_k + offsets
+
+    membership = np.zeros((n_rows, int(group_counts.sum())), dtype=np.float32)
+    for column in group_ids.T:
+        membership[np.arange(n_rows), column] = 1
+    sizes = membership.sum(axis=0)
+
+    row_scores = np.empty((n_rows, n_clusterings))
+    for rows, block in distance_blocks(X_array, distances):
+        distance_sums = block @ membership
+        for i in range(n_clusterings):
+            groups = slice(offsets[i], offsets[i] + group_counts[i])
+            own = labels_by_k[rows, i]
+            own_size = sizes[groups][own]
+
+            # a = mean distance to the rest of the own cluster; b = lowest mean distance to another cluster.
+            mean_distances = distance_sums[:, groups] / sizes[groups]
+            a = distance_sums[:, groups][np.arange(len(rows)), own] / np.maximum(own_size - 1, 1)
+            mean_distances[np.arange(len(rows)), own] = np.inf
+            b = mean_distances.min(axis=1)
+
+            # Rows alone in their cluster score 0, as in scikit-learn.
+            row_scores[rows, i] = np.where(own_size > 1, (b - a) / np.maximum(np.maximum(a, b), 1e-12), 0)
+    return row_scores
+
+
+def silhouette_scores(X_array, labels_by_k, distances=None):
+    # Mean silhouette score for each clustering.
+    return silhouette_by_row(X_array, labels_by_k, distances).mean(axis=0)
+
+
+def stratified_sample(labels, size, rng):
+    # Each cluster gets a share of the sample proportional to its size, and at least 2 rows when it has them.
+    counts = np.bincount(labels)
+    quotas = np.minimum(counts, np.maximum(np.round(size * counts / len(labels)).astype(int), 2))
+
+    # Shuffle, group rows by cluster, then keep the first quota rows of each cluster.
+    shuffled = rng.permutation(len(labels))
+    grouped = shuffled[np.argsort(labels[shuffled], kind="stable")]
+    rank = np.arange(len(labels)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return grouped[rank < quotas[labels[grouped]]]
+
+
+def sampled_silhouettes(X_array, labels_by_k, sample_size=SILHOUETTE_SAMPLE_SIZE, repeats=SILHOUETTE_REPEATS,
+                        random_state=42):
+    # Each repeat scores a fresh stratified sample; the spread of the repeats gives the confidence band.
+    rng = np.random.default_rng(random_state)
+    estimates = np.empty((repeats, labels_by_k.shape[1]))
+    for i, labels in enumerate(labels_by_k.T):
+        for repeat in range(repeats):
+            rows = stratified_sample(labels, sample_size, rng)
+            estimates[repeat, i] = silhouette_scores(X_array[rows], labels[rows][:, None])[0]
+
+    means = estimates.mean(axis=0)
+    # With only a few repeats, the t distribution gives a more honest band than the normal one.
+    t_value = stats.t.ppf((1 + CONFIDENCE_LEVEL) / 2, df=repeats - 1)
+    half_width = t_value * estimates.std(axis=0, ddof=1) / np.sqrt(repeats)
+    return means, means - half_width, means + half_width
+
+
+@st.cache_data(show_spinner="Scoring cluster separation...", max_entries=8)
+def cached_silhouettes(_X_array, _labels_by_k, _distances, data_key, model_key, approximate):
+    # Scores depend only on the data and the clusterings, which data_key and model_key identify.
+    # Returns means, band, and per-row values; exact scores have no band and sampled ones have no per-row values.
+    if approximate:
+        return tuple(values.tolist() for values in sampled_silhouettes(_X_array, _labels_by_k)) + (None,)
+    row_scores = silhouette_by_row(_X_array, _labels_by_k, _distances)
+    return row_scores.mean(axis=0).tolist(), None, None, row_scores
+
+
+@st.cache_data(show_spinner="Scoring the subset both ways...", max_entries=4)
+def compare_silhouette_methods(_X_array, _labels_by_k, data_key, model_key, subset_rows, sample_size):
+    """Exact and sampled silhouette scores on the same random subset of rows, with the time each took.
+
+    The subset stands in for a dataset too large to score exactly, so the gap between the two
+    shows how far the sampled estimate lands from the exact score and how much time it saves.
+    """
+    rows = np.sort(np.random.default_rng(42).choice(len(_X_array), size=subset_rows, replace=False))
+    X_subset, labels_subset = _X_array[rows], _labels_by_k[rows]
+
+    start = time.perf_counter()
+    exact = silhouette_scores(X_subset, labels_subset)
+    exact_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sampled, lower, upper = sampled_silhouettes(X_subset, labels_subset, sample_size=sample_size)
+    sampled_seconds = time.perf_counter() - start
+
+    scores = pd.DataFrame({"Exact": exact, "Sampled": sampled, "Band low": lower, "Band high": upper})
+    scores["Difference"] = scores["Sampled"] - scores["Exact"]
+    scores["Exact inside band"] = (scores["Exact"] >= lower) & (scores["Exact"] <= upper)
+    return scores, exact_seconds, sampled_seconds
+
+
+def show_silhouette_check(X_array, labels_by_k, k_values, data_key, model_key):
+    # Scores a user-chosen subset exactly and from samples, so the sampling used on large datasets can be checked.
+    st.markdown("#### Sampled vs Exact Silhouette")
+    if len(X_array) <= SILHOUETTE_CHECK_MIN_ROWS:
+        st.caption(f"The sampled silhouette check needs more than {SILHOUETTE_CHECK_MIN_ROWS} rows.")
+        return
+    if not st.toggle(
+            "Check sampled silhouette scores against exact ones",
+            key=f"{model_key[0]}_silhouette_check",
+            help="Scores a random subset of rows exactly and from stratified samples, then shows the gap and the time "
+                 "each took. Exact scoring compares every pair of rows in the subset, so large subsets take a while."):
+        return
+
+    subset_col, sample_col = st.columns(2)
+    max_rows = min(len(X_array), SILHOUETTE_CHECK_MAX_ROWS)
+    subset_rows = subset_col.slider(
+        "Rows in the subset",
+        min_value=SILHOUETTE_CHECK_MIN_ROWS,
+        max_value=max_rows,
+        value=min(max_rows, SILHOUETTE_EXACT_MAX_ROWS),
+        key=f"{model_key[0]}_silhouette_check_rows",
+        help="Both methods score this same random subset of rows.")
+    sample_size = sample_col.slider(
+        "Rows per sample",
+        min_value=SILHOUETTE_CHECK_MIN_ROWS // 4,
+        max_value=subset_rows // 2,
+        value=min(SILHOUETTE_SAMPLE_SIZE, subset_rows // 4),
+        key=f"{model_key[0]}_silhouette_check_sample",
+        help=f"The sampled estimate averages {SILHOUETTE_REPEATS} stratified samples of this many rows. "
+             f"Large datasets use {SILHOUETTE_SAMPLE_SIZE:,}.")
+
+    scores, exact_seconds, sampled_seconds = compare_silhouette_methods(
+        X_array, labels_by_k, data_key, model_key, subset_rows, sample_size)
+    st.dataframe(scores.set_axis(pd.Index(k_values, name="k")).round(4))
+    st.caption(
+        f"Exact scores for {subset_rows:,} rows took {exact_seconds:.2f} s; the sampled estimates took "
+        f"{sampled_seconds:.2f} s. The largest gap was {scores['Difference'].abs().max():.4f}, and the exact score "
+        f"fell inside the {CONFIDENCE_LEVEL:.0%} band for {int(scores['Exact inside band'].sum())} of {len(k_values)} "
+        "cluster counts. Exact time grows with the square of the rows, while sampled time stays about the same.")
+
+
+@st.cache_data(show_spinner="Computing the silhouette profile from a sample...", max_entries=8)
+def cached_silhouette_profile(_X_array, _labels, data_key, model_key, random_state=42):
+    # Scoring every row would compare every pair of rows, which the sampled scores exist to avoid.
+    # Instead one stratified sample keeps every cluster's share; returns the sampled rows and their values.
+    rows = stratified_sample(_labels, PROFILE_MAX_POINTS, np.random.default_rng(random_state))
+    return rows, silhouette_by_row(_X_array[rows], _labels[rows][:, None])[:, 0]
+
+
+def show_silhouette_profile(row_scores, clusters, model_name, total_rows=None):
+    # total_rows is given when row_scores come from a sample of a larger dataset.
+    st.subheader("Silhouette Profile")
+    summary = pd.DataFrame({"Cluster": clusters, "Silhouette": row_scores}).groupby("Cluster")["Silhouette"].agg(
+        Rows="size", **{"Mean Silhouette": "mean", "Share Negative": lambda values: (values < 0).mean()})
+
+    # Very large clusters are drawn from evenly spaced points of their sorted values, which keeps the shape.
+    points_per_row = min(1.0, PROFILE_MAX_POINTS / len(row_scores))
+
+    fig, ax = plt.subplots(figsize=(8, 5))
+    y_start = 0
+    for cluster in summary.index:
+        values = np.sort(row_scores[clusters == cluster])
+        shown = values[np.linspace(0, len(values) - 1, max(2, int(len(values) * points_per_row))).astype(int)]
+        y = np.linspace(y_start, y_start + len(values), len(shown))
+        ax.fill_betweenx(y, 0, shown, color=f"C{cluster}", alpha=0.8)
+        ax.text(-0.05, y_start + len(values) / 2, str(cluster), ha="right", va="center")
+        y_start += len(values) + max(1, len(row_scores) // 100)
+
+    ax.axvline(row_scores.mean(), color="#ff4b4b", linestyle="--", label=f"Average = {row_scores.mean():.2f}")
+    ax.axvline(0, color="black", linewidth=0.8)
+    ax.set_title(f"{model_name} Silhouette Profile")
+    ax.set_xlabel("Silhouette Value")
+    ax.set_ylabel("Cluster")
+    ax.set_yticks([])
+    ax.grid(True, axis="x", alpha=0.3)
+    ax.legend()
+    st.pyplot(fig)
+    st.caption(
+        "Each bar is one row, sorted within its cluster. Values near 1 sit well inside their cluster, values near 0 "
+        "sit between clusters, and negative values are closer to another cluster than to their own.")
+    if total_rows is not None:
+        st.caption(
+            f"With {total_rows:,} rows, the profile is computed from a stratified sample of {len(row_scores):,} rows, "
+            "so each cluster keeps its share and Rows counts sampled rows.")
+
+    st.dataframe(summary.round(3))
+
+    # A cluster where most rows would rather belong elsewhere is probably not a real group.
+    weak_clusters = summary.index[summary["Share Negative"] > 0.5].tolist()
+    if weak_clusters:
+        st.warning(
+            f"Most rows in cluster(s) {', '.join(map(str, weak_clusters))} have negative silhouette values, "
+            "so they are closer to other clusters than to their own. Try a different number of clusters.")
+
+
+def fit_kmeans(X_array, k, algorithm="Standard", init=None):
+    # Returns the fitted model and its fit time in seconds. Given starting centers, one run from them is enough.
+    # Mini-batch K-Means moves the centers using small random batches, which is much faster on large datasets.
+    if algorithm == "Mini-batch":
+        model = MiniBatchKMeans(n_clusters=k, random_state=42, n_init=3, batch_size=MINIBATCH_SIZE)
+    else:
+        model = KMeans(n_clusters=k, random_state=42, n_init=10)
+    if init is not None:
+        model.set_params(init=init, n_init=1)
+    start = time.perf_counter()
+    model.fit(X_array)
+    return model, time.perf_counter() - start
+
+
+def fit_kmeans_single_thread(X_array, k, algorithm="Standard"):
+    # Thread limits only apply to the thread that sets them, so each parallel task sets its own.
+    # Otherwise every task would use all cores and the side-by-side fits would fight over them.
+    with threadpool_limits(limits=1):
+        return fit_kmeans(X_array, k, algorithm)
+
+
+def warm_started_sweep(X_array, k_values, algorithm="Standard", restarts=WARM_START_RESTARTS, random_state=42):
+    """Fits each k from the centers found for the previous k plus one new center.
+
+    The new center is a row drawn with k-means++ weighting, so rows far from every current center are
+    more likely. A few draws are tried and the lowest inertia is kept. Only the smallest k starts from scratch.
+    """
+    rng = np.random.default_rng(random_state)
+    model, seconds = fit_kmeans(X_array, k_values[0], algorithm)
+    models, fit_seconds = {k_values[0]: model}, {k_values[0]: seconds}
+
+    for k in k_values[1:]:
+        start = time.perf_counter()
+        # Squared distance from each row to its nearest current center.
+        nearest = model.transform(X_array).min(axis=1) ** 2
+        weights = nearest / nearest.sum() if nearest.sum() > 0 else None
+
+        # One fresh k-means++ start is also tried, so a poor split inherited from a smaller k is not locked in.
+        candidates = [fit_kmeans(X_array, k, algorithm, init="k-means++")[0]]
+        for _ in range(restarts):
+            new_center = X_array[rng.choice(len(X_array), p=weights)]
+            init = np.vstack([model.cluster_centers_, new_center])
+            candidates.append(fit_kmeans(X_array, k, algorithm, init=init)[0])
+
+        model = models[k] = min(candidates, key=lambda candidate: candidate.inertia_)
+        fit_seconds[k] = time.perf_counter() - start
+    return models, fit_seconds
+
+
+@st.cache_resource(show_spinner="Comparing cluster counts...", max_entries=4)
+def kmeans_sweep(_X_array, data_key, k_values, algorithm="Standard", warm_start=False):
+    # A warm-started sweep depends on the previous k, so it runs one k after another.
+    # It gets the same one-thread limit as each independent fit, so their fit times compare fairly.
+    if warm_start:
+        with threadpool_limits(limits=1):
+            return warm_started_sweep(_X_array, k_values, algorithm)
+
+    # Every k is fitted as its own task, one core each, instead of one k after another.
+    with ThreadPoolExecutor(max_workers=min(len(k_values), os.cpu_count() or 1)) as pool:
+        fits = list(pool.map(lambda k: fit_kmeans_single_thread(_X_array, k, algorithm), k_values))
+
+    # Cached by data version, features, scaling, and sweep settings, so moving the k slider reuses these fits.
+    models = {k: model for k, (model, _) in zip(k_values, fits)}
+    fit_seconds = {k: seconds for k, (_, seconds) in zip(k_values, fits)}
+    return models, fit_seconds
+
+
+def csv_chunks(source, features):
+    # Reads only the selected columns, one chunk at a time; rows with missing or non-numeric values are skipped.
+    source.seek(0)
+    for chunk in pd.read_csv(source, usecols=features, chunksize=STREAM_CHUNK_ROWS):
+        yield chunk[features].apply(pd.to_numeric, errors="coerce").dropna().to_numpy(dtype=float)
+
+
+def stream_kmeans(source, features, k, scale, on_progress):
+    """Fits Mini-batch K-Means on a CSV file without loading it, reporting progress after every chunk.
+
+    The file is read once to fit the scaler (when scaling), once to fit the centers, and once more to
+    measure the final inertia and cluster sizes. Only one parsed chunk is in memory at a time.
+    """
+    passes = ["scaling", "fitting", "scoring"] if scale else ["fitting", "scoring"]
+    scaler = StandardScaler() if scale else None
+    model = MiniBatchKMeans(n_clusters=k, random_state=42, n_init=3, batch_size=MINIBATCH_SIZE)
+    history = []
+    counts = np.zeros(k, dtype=int)
+    inertia = 0.0
+    rows_seen = 0
+    fit_seconds = 0.0
+    total_start = time.perf_counter()
+
+    for pass_number, pass_name in enumerate(passes):
+        for chunk in csv_chunks(source, features):
+            if len(chunk) == 0:
+                continue
+            if pass_name == "scaling":
+                scaler.partial_fit(chunk)
+            else:
+                if scaler is not None:
+                    chunk = scaler.transform(chunk)
+
+                if pass_name == "fitting":
+                    start = time.perf_counter()
+                    if rows_seen == 0:
+                        # The first chunk gets a full fit with several starts, so one unlucky start is not kept.
+                        model.fit(chunk)
+                    else:
+                        # Each later chunk is scored before the centers learn from it, which shows how they settle.
+                        history.append((rows_seen, -model.score(chunk) / len(chunk)))
+                        for batch_start in range(0, len(chunk), MINIBATCH_SIZE):
+                            model.partial_fit(chunk[batch_start:batch_start + MINIBATCH_SIZE])
+                    rows_seen += len(chunk)
+                    fit_seconds += time.perf_counter() - start
+                else:
+                    counts += np.bincount(model.predict(chunk), minlength=k)
+                    inertia -= model.score(chunk)
+
+            done = (pass_number + min(source.tell() / max(source.size, 1), 1.0)) / len(passes)
+            on_progress(done, text=f"{pass_name.capitalize()} ({pass_number + 1} of {len(passes)})")
+
+    history = pd.DataFrame(history, columns=["Rows streamed", "Inertia per row"])
+    return {"model": model, "scaler": scaler, "history": history, "counts": counts, "inertia": inertia,
+            "rows": int(counts.sum()), "fit_seconds": fit_seconds, "total_seconds": time.perf_counter() - total_start}
+
+
+def compact_labels(labels_by_k):
+    # Renumbers each column's labels to 0..k-1, so empty clusters or -1 noise labels leave no gaps in the ids.
+    return np.column_stack([np.unique(labels, return_inverse=True)[1].ravel() for labels in labels_by_k.T])
+
+
+def within_cluster_ss(X_array, labels_by_k):
+    """Within-cluster sum of squares for several clusterings at once.
+
+    labels_by_k has one column of cluster labels per clustering. Labels can be any integers (gaps
+    or -1 included); each column is renumbered 0..k-1 first. Every cluster of every clustering then
+    gets its own group id, so one bincount per feature covers all of them.
+    """
+    # Centering first keeps "total minus between" accurate for features with large means.
+    X_centered = X_array - X_array.mean(axis=0)
+    n_rows, n_clusterings = labels_by_k.shape
+
+    labels_by_k = compact_labels(labels_by_k)
+    group_counts = labels_by_k.max(axis=0) + 1
+    offsets = np.concatenate([[0], np.cumsum(group_counts)[:-1]])
+    group_ids = (labels_by_k + offsets).ravel(order="F")
+    n_groups = int(group_counts.sum())
+
+    # Sum of squares within clusters = total sum of squares - sum over clusters of |cluster sum|^2 / size.
+    sizes = np.bincount(group_ids, minlength=n_groups)
+    squared_sums = np.zeros(n_groups)
+    for column in X_centered.T:
+        squared_sums += np.bincount(group_ids, weights=np.tile(column, n_clusterings), minlength=n_groups) ** 2
+
+    between = np.bincount(
+        np.repeat(np.arange(n_clusterings), group_counts), weights=squared_sums / sizes, minlength=n_clusterings)
+    return (X_centered ** 2).sum() - between
+
+
+@st.cache_resource(show_spinner="Building the cluster tree...", max_entries=4)
+def build_hierarchy(_distances, data_key, linkage_method):
+    # One full merge tree per data and linkage method; every cluster count is a cut of this tree.
+    # It is built from the shared distance matrix (ward on Euclidean distances matches ward on rows).
+    return linkage(_distances, method=linkage_method)
+
+
+def cut_hierarchy(tree, k):
+    # Applying the first n - k merges leaves exactly k clusters.
+    # Merge order is used instead of merge height so tied heights still give exactly k groups.
+    n_rows = len(tree) + 1
+    labels = fcluster(tree, t=n_rows - k - 1, criterion="monocrit", monocrit=np.arange(n_rows - 1, dtype=float))
+    return labels - 1
+
+
+def hierarchy_labels(X_array, tree, k_values, sample_rows=None):
+    # One column of labels per k. A tree built on sample rows labels those rows by its cuts, and every other
+    # row joins the sample cluster with the nearest center (pairwise_distances_argmin works in bounded chunks).
+    sample_labels = np.column_stack([cut_hierarchy(tree, k) for k in k_values])
+    if sample_rows is None:
+        return sample_labels
+
+    X_sample = X_array[sample_rows]
+    labels_by_k = np.empty((len(X_array), len(k_values)), dtype=int)
+    for i, k in enumerate(k_values):
+        centers = np.vstack([X_sample[sample_labels[:, i] == cluster].mean(axis=0) for cluster in range(k)])
+        labels_by_k[:, i] = pairwise_distances_argmin(X_array, centers)
+        labels_by_k[sample_rows, i] = sample_labels[:, i]
+    return labels_by_k
+
+
+def cut_height(tree, k):
+    # Halfway between the last merge kept and the first merge undone for k clusters.
+    n_rows = len(tree) + 1
+    return (tree[n_rows - k - 1, 2] + tree[n_rows - k, 2]) / 2
+
+
+def choose_pca_engine(n_rows, n_features, n_components):
+    # Narrow data: the covariance matrix is small, the result is exact, and the rows are never copied.
+    if n_features <= PCA_COVARIANCE_MAX_FEATURES and n_rows >= n_features:
+        return "Covariance"
+    # Wide data too large to copy: IncrementalPCA reads row chunks, so memory stays bounded.
+    if n_rows * n_features * 8 > PCA_MEMORY_LIMIT_BYTES:
+        return "Incremental"
+    # Other wide data keeping only a few components: a randomized truncated SVD.
+    if n_components < 0.8 * min(n_rows, n_features):
+        return "Randomized"
+    return "Full SVD"
+
+
+def fit_pca(X_array, n_components, engine):
+    # Returns the fitted model and the component scores of every row.
+    if engine == "Incremental":
+        # Chunks are at least n_components rows each, which IncrementalPCA needs for every batch.
+        chunks = np.array_split(X_array, max(1, len(X_array) * X_array.shape[1] // PCA_CHUNK_CELLS))
+        pca = IncrementalPCA(n_components=n_components)
+        for chunk in chunks:
+            pca.partial_fit(chunk)
+        return pca, np.vstack([pca.transform(chunk) for chunk in chunks])
+
+    pca = PCA(n_components=n_components, svd_solver=PCA_SOLVERS[engine], random_state=42)
+    return pca, pca.fit_transform(X_array)
+
+
+@st.cache_resource(show_spinner="Computing principal components...", max_entries=4)
+def cached_pca(_X_array, data_key, engine=None):
+    # One decomposition per data, features, and scaling, shared by the PCA tab and both cluster scatter plots.
+    # Leading components do not depend on how many are kept, so views slice these instead of refitting.
+    # The engine comes from the data shape unless one is requested, as the exact comparison does.
+    n_components = min(PCA_MAX_COMPONENTS, *_X_array.shape)
+    engine = engine or choose_pca_engine(*_X_array.shape, n_components)
+    start = time.perf_counter()
+    pca, scores = fit_pca(_X_array, n_components, engine)
+    return pca, scores, engine, time.perf_counter() - start
+
+
+def make_data_key(X_array, selected_features, scale_data):
+    # Identifies this exact input matrix for the caches above, which every session shares.
+    # data_version is a random id that changes with every data change, and the shape is a cheap extra guard.
+    return (st.session_state["data_version"], st.session_state.get("dataset_name"),
+            tuple(selected_features), scale_data, X_array.shape)
+
+
+def show_download(results_df, result_key, label, file_stem):
+    format_col, button_col = st.columns([1, 2], vertical_alignment="bottom")
+    file_format = format_col.selectbox(
+        "Download format",
+        list(EXPORT_FORMATS),
+        key=f"{file_stem}_format",
+        help="Compressed CSV and Parquet files are much smaller for large datasets. Parquet also keeps column types.")
+    extension, mime = EXPORT_FORMATS[file_format]
+
+    # Passing a function means the file is only built when the button is clicked, not on every rerun.
+    button_col.download_button(
+        label,
+        data=lambda: export_bytes(results_df, result_key, file_format),
+        file_name=f"{file_stem}.{extension}",
+        mime=mime
+    )
+
 
 # This page depends on the cleaned dataframe saved by the Data Cleaning page.
 if "dataframe" not in st.session_state:
@@ -21,6 +608,8 @@ if "dataframe" not in st.session_state:
 
 # Pull the cleaned dataframe from session state.
 df = st.session_state["dataframe"]
+# Cached results are keyed on data_version, so data placed here without one still gets its own id.
+st.session_state.setdefault("data_version", uuid.uuid4().hex)
 numeric_columns = df.select_dtypes(include="number").columns.tolist()
 
 # K-Means, hierarchical clustering, and PCA all need numeric inputs.
@@ -47,6 +636,20 @@ with st.sidebar:
             "K-Means finds groups of similar rows in your dataset. "
             "Use it when you want to split observations into a set number of clusters.")
 
+        kmeans_algorithm = st.radio(
+            "K-Means algorithm",
+            ["Standard", "Mini-batch"],
+            help="Mini-batch K-Means updates the clusters from small random batches of rows. "
+                 "It is much faster on large datasets and usually lands very close to standard K-Means.")
+        stream_csv = kmeans_algorithm == "Mini-batch" and st.toggle(
+            "Stream a large CSV file",
+            help="Cluster a CSV file that is too large to load by reading it in chunks, instead of using the cleaned dataset.")
+        # Mini-batch fits are already cheap, so warm starts are offered for standard K-Means only.
+        warm_start = kmeans_algorithm == "Standard" and st.toggle(
+            "Warm-start the k sweep",
+            help="Start each number of clusters from the centers found for one fewer cluster plus one new center, "
+                 f"trying {WARM_START_RESTARTS} new centers instead of 10 fresh starts. Much faster on large datasets.")
+
     elif method == "Hierarchical Clustering":
         st.subheader("Hierarchical Clustering")
         st.info(
@@ -68,11 +671,27 @@ st.info("❓ Hover over the small question mark icons next to controls for extra
 if method == "K-Means Clustering":
     st.subheader("Step 1: Select Features")
 
-    selected_features = st.multiselect(
-        "Select features for K-Means",
-        numeric_columns,
-        default=numeric_columns,
-        help="Choose the numeric columns K-Means should use to group similar rows.")
+    if stream_csv:
+        # The streamed file is separate from the cleaned dataset, so its own numeric columns are offered.
+        stream_file = st.file_uploader(
+            "Upload a large CSV file to stream",
+            type="csv",
+            help="The file is parsed in chunks, so the full table is never built in memory.")
+        stream_columns = []
+        if stream_file is not None:
+            stream_columns = pd.read_csv(stream_file, nrows=1000).select_dtypes(include="number").columns.tolist()
+
+        selected_features = st.multiselect(
+            "Select features for Mini-batch K-Means",
+            stream_columns,
+            default=stream_columns,
+            help="Choose the numeric columns of the uploaded file that K-Means should use to group similar rows.")
+    else:
+        selected_features = st.multiselect(
+            "Select features for K-Means",
+            numeric_columns,
+            default=numeric_columns,
+            help="Choose the numeric columns K-Means should use to group similar rows.")
 
     st.subheader("Step 2: Choose Model Settings")
 
@@ -83,7 +702,64 @@ if method == "K-Means Clustering":
         value=3,
         help="This is the number of distinct groups you want to categorize your data into.")
 
-    if len(selected_features) >= 2:
+    if stream_csv and (stream_file is None or len(selected_features) < 2):
+        st.warning("Please upload a CSV file and select at least 2 numeric features to stream.")
+
+    elif stream_csv:
+        st.subheader("Step 3: Stream the File")
+        st.caption(
+            f"The file is read {STREAM_CHUNK_ROWS:,} rows at a time and the centers are updated from batches of "
+            f"{MINIBATCH_SIZE:,} rows, so only one chunk is parsed at a time. Rows are used in file order.")
+
+        # Results are kept for this file and these settings, so other widgets can change without streaming again.
+        stream_key = (stream_file.file_id, tuple(selected_features), scale_data, n_clusters)
+        if st.button("Stream and fit Mini-batch K-Means"):
+            progress_bar = st.progress(0.0, text="Starting...")
+            try:
+                st.session_state["stream_kmeans"] = (
+                    stream_key, stream_kmeans(stream_file, selected_features, n_clusters, scale_data, progress_bar.progress))
+            except ValueError as error:
+                st.warning(f"The file could not be clustered: {error}")
+            progress_bar.empty()
+
+        stored_key, stream_result = st.session_state.get("stream_kmeans", (None, None))
+        if stored_key != stream_key:
+            st.info("Press the button to stream the file with the current settings.")
+        else:
+            st.subheader("Step 4: View Model Results")
+
+            summary = pd.DataFrame({
+                "Rows clustered": [stream_result["rows"]],
+                "Fit time (s)": [round(stream_result["fit_seconds"], 2)],
+                "Total time with reading (s)": [round(stream_result["total_seconds"], 2)],
+                "Inertia": [round(stream_result["inertia"], 2)],
+                "Inertia per row": [round(stream_result["inertia"] / max(stream_result["rows"], 1), 4)]})
+            st.dataframe(summary, hide_index=True)
+
+            st.write("Number of rows in each cluster:")
+            st.dataframe(pd.Series(stream_result["counts"], name="count").rename_axis("Cluster"))
+
+            # Centers are shown in the original units so they can be read like rows of the file.
+            centers = stream_result["model"].cluster_centers_
+            if stream_result["scaler"] is not None:
+                centers = stream_result["scaler"].inverse_transform(centers)
+            st.write("Cluster centers:")
+            st.dataframe(pd.DataFrame(centers, columns=selected_features).rename_axis("Cluster").round(4))
+
+            history = stream_result["history"]
+            if len(history) > 1:
+                fig, ax = plt.subplots(figsize=(8, 4))
+                ax.plot(history["Rows streamed"], history["Inertia per row"], marker="o", color="#1C8510", linewidth=2)
+                ax.set_title("Mini-batch K-Means Convergence")
+                ax.set_xlabel("Rows Streamed")
+                ax.set_ylabel("Inertia per Row")
+                ax.grid(True, alpha=0.3)
+                st.pyplot(fig)
+                st.caption(
+                    "Each point scores the next chunk with the centers learned so far, before they learn from it. "
+                    "A flat line means the centers have settled and more data no longer changes them much.")
+
+    elif len(selected_features) >= 2:
         # Drop rows with missing selected features so scikit-learn receives complete numeric data.
         X = df[selected_features].dropna()
 
@@ -102,20 +778,23 @@ if method == "K-Means Clustering":
 
         X_array = np.asarray(X_std)
 
+        data_key = make_data_key(X_array, selected_features, scale_data)
+        # Large datasets switch to sampled silhouette estimates, which also skips the shared distance matrix.
+        approximate = len(X) > SILHOUETTE_EXACT_MAX_ROWS
+        distances = None if approximate else shared_distances(X_array, data_key)
+        if not approximate and distances is None:
+            st.caption("This dataset is too large to keep every pairwise distance in memory, so distances are computed in chunks.")
+
         st.subheader("Step 3: Compare Cluster Options")
 
         # Test several k values so users can compare possible cluster counts.
         max_k = min(10, len(X) - 1)
-        k_values = list(range(2, max_k + 1))
-        inertia_values = []
-        silhouette_values = []
-
-        for k in k_values:
-            # Inertia supports the elbow plot; silhouette supports separation feedback.
-            test_kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-            test_clusters = test_kmeans.fit_predict(X_array)
-            inertia_values.append(test_kmeans.inertia_)
-            silhouette_values.append(silhouette_score(X_array, test_clusters))
+        k_values = tuple(range(2, max_k + 1))
+        sweep, fit_seconds = kmeans_sweep(X_array, data_key, k_values, kmeans_algorithm, warm_start)
+        inertia_values = [sweep[k].inertia_ for k in k_values]
+        labels_by_k = np.column_stack([sweep[k].labels_ for k in k_values])
+        silhouette_values, silhouette_lower, silhouette_upper, silhouette_rows = cached_silhouettes(
+            X_array, labels_by_k, distances, data_key, ("kmeans", kmeans_algorithm, warm_start, k_values), approximate)
 
         elbow_col, silhouette_col = st.columns(2)
 
@@ -136,8 +815,10 @@ if method == "K-Means Clustering":
         with silhouette_col:
             fig, ax = plt.subplots(figsize=(6, 4))
             ax.plot(k_values, silhouette_values, marker="o", color="#1C8510", linewidth=2)
+            if approximate:
+                ax.fill_between(k_values, silhouette_lower, silhouette_upper, color="#1C8510", alpha=0.2, label="95% band")
             ax.axvline(n_clusters, color="#ff4b4b", linestyle="--", label="Selected k")
-            ax.set_title("Silhouette Plot")
+            ax.set_title("Silhouette Plot (sampled)" if approximate else "Silhouette Plot")
             ax.set_xlabel("Number of Clusters")
             ax.set_ylabel("Silhouette Score")
             ax.grid(True, alpha=0.3)
@@ -146,11 +827,43 @@ if method == "K-Means Clustering":
             st.caption(
                 "This silhouette plot compares how well rows fit inside their assigned K-Means cluster. "
                 "Higher silhouette scores usually mean rows fit better inside their own cluster than in other clusters.")
+            if approximate:
+                st.caption(
+                    f"With {len(X):,} rows, each score is the average of {SILHOUETTE_REPEATS} stratified samples of "
+                    f"{SILHOUETTE_SAMPLE_SIZE:,} rows. The shaded band shows how much the estimate could move.")
+
+        show_silhouette_check(X_array, labels_by_k, k_values, data_key, ("kmeans", kmeans_algorithm, warm_start, k_values))
+
+        if warm_start:
+            st.markdown("#### Warm Start vs Independent Fits")
+            compare_independent = st.toggle(
+                "Fit every k independently for comparison",
+                value=len(X) <= COMPARE_MAX_ROWS,
+                help="The usual sweep fits every k from scratch, so it can be slow on large datasets.")
+            if compare_independent:
+                independent, independent_seconds = kmeans_sweep(X_array, data_key, k_values, kmeans_algorithm)
+                comparison = pd.DataFrame({
+                    "Warm start time (s)": [fit_seconds[k] for k in k_values],
+                    "Independent time (s)": [independent_seconds[k] for k in k_values],
+                    "Warm start inertia": inertia_values,
+                    "Independent inertia": [independent[k].inertia_ for k in k_values]},
+                    index=pd.Index(k_values, name="k"))
+                comparison["Inertia difference"] = (
+                    comparison["Warm start inertia"] / comparison["Independent inertia"] - 1).map("{:+.2%}".format)
+                st.dataframe(comparison.round(3))
+                # Every fit in both sweeps is limited to one thread (the independent ones inside their own tasks).
+                # Independent fits run side by side, so the summed single-thread fit times are compared, not wall time.
+                st.caption(
+                    f"The warm-started sweep spent {sum(fit_seconds.values()):.2f} s fitting, compared with "
+                    f"{sum(independent_seconds.values()):.2f} s for independent fits. Every fit in both sweeps used "
+                    "one thread, so the times compare like with like. "
+                    "A positive inertia difference means the warm start found looser clusters for that k.")
 
         st.subheader("Step 4: View Model Results")
 
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-        clusters = kmeans.fit_predict(X_array)
+        # The selected k was already fitted in the sweep, so its model is reused instead of refitted.
+        kmeans = sweep[n_clusters]
+        clusters = kmeans.labels_
 
         # Put cluster assignments first so they are easy to scan and export.
         results_df = X.copy()
@@ -162,17 +875,35 @@ if method == "K-Means Clustering":
         st.write("Cluster labels for each row:")
         st.dataframe(results_df)
 
-        st.download_button(
+        show_download(
+            results_df,
+            data_key + (n_clusters, kmeans_algorithm, warm_start),
             "Download K-Means Clustered Dataset",
-            data=results_df.to_csv(index=False).encode("utf-8"),
-            file_name="kmeans_clustered_dataset.csv",
-            mime="text/csv"
-        )
+            "kmeans_clustered_dataset")
+
+        if kmeans_algorithm == "Mini-batch":
+            st.subheader("Mini-batch vs Standard K-Means")
+            compare_standard = st.toggle(
+                "Fit standard K-Means for comparison",
+                value=len(X) <= COMPARE_MAX_ROWS,
+                help="Standard K-Means uses every row in every step, so it can be slow on large datasets.")
+            if compare_standard:
+                standard_models, standard_seconds = kmeans_sweep(X_array, data_key, (n_clusters,), "Standard")
+                standard = standard_models[n_clusters]
+                comparison = pd.DataFrame({
+                    "Fit time (s)": [fit_seconds[n_clusters], standard_seconds[n_clusters]],
+                    "Inertia": [kmeans.inertia_, standard.inertia_],
+                    "Passes over the data": [kmeans.n_iter_, standard.n_iter_]},
+                    index=["Mini-batch", "Standard"])
+                st.dataframe(comparison.round(3))
+                st.caption(
+                    f"For k = {n_clusters}, Mini-batch K-Means took {fit_seconds[n_clusters]:.2f} s to fit versus "
+                    f"{standard_seconds[n_clusters]:.2f} s for standard K-Means. Its inertia was "
+                    f"{kmeans.inertia_ / standard.inertia_ - 1:+.1%} relative to standard K-Means; lower inertia means tighter clusters.")
 
         st.subheader("Cluster Scatter Plot")
         # PCA is used here only to visualize multi-feature clusters in two dimensions.
-        pca = PCA(n_components=2)
-        X_pca = pca.fit_transform(X_array)
+        X_pca = cached_pca(X_array, data_key)[1]
 
         scatter_df = pd.DataFrame({
             "PC1": X_pca[:, 0],
@@ -200,6 +931,14 @@ if method == "K-Means Clustering":
             "This scatter plot uses PCA to compress the selected features into two axes. "
             "Points close together have similar feature values, and the colors show the K-Means cluster assignments."
         )
+
+        # Exact mode already has every row's silhouette; sampled mode profiles a stratified sample of rows.
+        if silhouette_rows is not None:
+            show_silhouette_profile(silhouette_rows[:, k_values.index(n_clusters)], clusters, "K-Means")
+        else:
+            profile_rows, row_scores = cached_silhouette_profile(
+                X_array, clusters, data_key, ("kmeans", kmeans_algorithm, warm_start, n_clusters))
+            show_silhouette_profile(row_scores, clusters[profile_rows], "K-Means", total_rows=len(X))
     else:
         st.warning("Please select at least 2 numeric features for K-Means.")
 
@@ -248,29 +987,37 @@ if method == "Hierarchical Clustering":
 
         X_array = np.asarray(X_std)
 
+        data_key = make_data_key(X_array, selected_features, scale_data)
+        # The tree needs the distances either way; only the silhouette scores switch to samples on large datasets.
+        approximate = len(X) > SILHOUETTE_EXACT_MAX_ROWS
+        distances = shared_distances(X_array, data_key)
+
         st.subheader("Step 3: Compare Cluster Options")
 
-        # Compare multiple cluster counts before fitting the final hierarchical model.
+        # The merge tree is built once (from the shared distances); each cluster count below is a cut of it.
+        if distances is None:
+            # The tree needs every pairwise distance at once, so above the memory limit it is built from a sample.
+            sample_rows = np.sort(np.random.default_rng(42).choice(len(X), size=HIERARCHY_SAMPLE_ROWS, replace=False))
+            sample_key = data_key + ("hierarchy sample", HIERARCHY_SAMPLE_ROWS)
+            tree = build_hierarchy(shared_distances(X_array[sample_rows], sample_key), sample_key, linkage_method)
+            needed_mb = len(X) * (len(X) - 1) // 2 * 4 / 1024 ** 2
+            st.caption(
+                f"Every pairwise distance for {len(X):,} rows would need {needed_mb:,.0f} MB, above the "
+                f"{DISTANCE_MEMORY_LIMIT_BYTES // 1024 ** 2} MB limit. The tree is built from a random sample of "
+                f"{HIERARCHY_SAMPLE_ROWS:,} rows, and every other row joins the cluster with the nearest center.")
+        else:
+            sample_rows = None
+            tree = build_hierarchy(distances, data_key, linkage_method)
+
+        # Compare multiple cluster counts before choosing the final hierarchical clusters.
         max_k = min(10, len(X) - 1)
         k_values = list(range(2, max_k + 1))
-        elbow_values = []
-        silhouette_values = []
-
-        for k in k_values:
-            test_hierarchical = AgglomerativeClustering(
-                n_clusters=k,
-                linkage=linkage_method)
-            test_clusters = test_hierarchical.fit_predict(X_array)
+        labels_by_k = hierarchy_labels(X_array, tree, k_values, sample_rows)
 
-            # Approximate an elbow-style score by measuring spread around each cluster average.
-            cluster_total = 0
-            for cluster in np.unique(test_clusters):
-                cluster_rows = X_array[test_clusters == cluster]
-                cluster_center = cluster_rows.mean(axis=0)
-                cluster_total += ((cluster_rows - cluster_center) ** 2).sum()
-
-            elbow_values.append(cluster_total)
-            silhouette_values.append(silhouette_score(X_array, test_clusters))
+        # An elbow-style score: spread around each cluster average, for every k in one pass.
+        elbow_values = within_cluster_ss(X_array, labels_by_k)
+        silhouette_values, silhouette_lower, silhouette_upper, silhouette_rows = cached_silhouettes(
+            X_array, labels_by_k, distances, data_key, ("hierarchical", linkage_method), approximate)
 
         elbow_col, silhouette_col = st.columns(2)
 
@@ -291,8 +1038,10 @@ if method == "Hierarchical Clustering":
         with silhouette_col:
             fig, ax = plt.subplots(figsize=(6, 4))
             ax.plot(k_values, silhouette_values, marker="o", color="#1C8510", linewidth=2)
+            if approximate:
+                ax.fill_between(k_values, silhouette_lower, silhouette_upper, color="#1C8510", alpha=0.2, label="95% band")
             ax.axvline(n_clusters, color="#ff4b4b", linestyle="--", label="Selected k")
-            ax.set_title("Silhouette Plot")
+            ax.set_title("Silhouette Plot (sampled)" if approximate else "Silhouette Plot")
             ax.set_xlabel("Number of Clusters")
             ax.set_ylabel("Silhouette Score")
             ax.grid(True, alpha=0.3)
@@ -301,14 +1050,16 @@ if method == "Hierarchical Clustering":
             st.caption(
                 "This silhouette plot compares how clearly the hierarchical clusters separate from each other. "
                 "Higher values usually mean the clusters are more distinct.")
+            if approximate:
+                st.caption(
+                    f"With {len(X):,} rows, each score is the average of {SILHOUETTE_REPEATS} stratified samples of "
+                    f"{SILHOUETTE_SAMPLE_SIZE:,} rows. The shaded band shows how much the estimate could move.")
 
-        st.subheader("Step 4: View Model Results")
+        show_silhouette_check(X_array, labels_by_k, k_values, data_key, ("hierarchical", linkage_method))
 
-        hierarchical = AgglomerativeClustering(
-            n_clusters=n_clusters,
-            linkage=linkage_method)
+        st.subheader("Step 4: View Model Results")
 
-        clusters = hierarchical.fit_predict(X_array)
+        clusters = labels_by_k[:, k_values.index(n_clusters)]
 
         # Put cluster assignments first so the result table and CSV are easier to read.
         results_df = X.copy()
@@ -320,17 +1071,15 @@ if method == "Hierarchical Clustering":
         st.write("Cluster labels for each row:")
         st.dataframe(results_df)
 
-        st.download_button(
+        show_download(
+            results_df,
+            data_key + (n_clusters, linkage_method),
             "Download Hierarchical Clustered Dataset",
-            data=results_df.to_csv(index=False).encode("utf-8"),
-            file_name="hierarchical_clustered_dataset.csv",
-            mime="text/csv"
-        )
+            "hierarchical_clustered_dataset")
 
         st.subheader("Cluster Scatter Plot")
         # PCA gives a two-dimensional view of the hierarchical cluster assignments.
-        pca = PCA(n_components=2)
-        X_pca = pca.fit_transform(X_array)
+        X_pca = cached_pca(X_array, data_key)[1]
 
         scatter_df = pd.DataFrame({
             "PC1": X_pca[:, 0],
@@ -359,6 +1108,13 @@ if method == "Hierarchical Clustering":
             "Nearby points are more similar based on the selected features, and each color represents a cluster."
         )
 
+        if silhouette_rows is not None:
+            show_silhouette_profile(silhouette_rows[:, k_values.index(n_clusters)], clusters, "Hierarchical")
+        else:
+            profile_rows, row_scores = cached_silhouette_profile(
+                X_array, clusters, data_key, ("hierarchical", linkage_method, n_clusters))
+            show_silhouette_profile(row_scores, clusters[profile_rows], "Hierarchical", total_rows=len(X))
+
         st.divider()
 
         label_options = ["Row Number"] + df.select_dtypes(exclude="number").columns.tolist()
@@ -387,35 +1143,47 @@ if method == "Hierarchical Clustering":
 
 
         st.subheader("Dendrogram")
-        # Limit the dendrogram to a random sample so labels remain readable.
-        dendrogram_size = min(50, len(X))
-        rng = np.random.default_rng(42)
-        dendrogram_positions = np.sort(rng.choice(len(X), size=dendrogram_size, replace=False))
-        dendrogram_data = X_array[dendrogram_positions]
-
+        # Labels are only shown for branches that are single rows.
         if label_column == "Row Number":
-            dendrogram_labels = X.index[dendrogram_positions].astype(str)
+            dendrogram_labels = X.index.astype(str)
         else:
-            dendrogram_labels = (
-                df.loc[X.index[dendrogram_positions], label_column]
-                .astype(str)
-                .str.slice(0, 25))
+            dendrogram_labels = df.loc[X.index, label_column].astype(str).str.slice(0, 25)
+        if sample_rows is not None:
+            # A sampled tree has one leaf per sample row.
+            dendrogram_labels = np.asarray(dendrogram_labels)[sample_rows]
 
+        # The dendrogram is drawn from the same tree as the clusters, cut to its top branches so labels remain readable.
         fig, ax = plt.subplots(figsize=(10, 6))
-        linked = linkage(dendrogram_data, method=linkage_method)
-        dendrogram(linked, ax=ax, labels=dendrogram_labels.tolist(), leaf_rotation=90)
+        selected_height = cut_height(tree, n_clusters)
+        dendrogram(
+            tree,
+            ax=ax,
+            labels=dendrogram_labels.tolist(),
+            leaf_rotation=90,
+            truncate_mode="lastp",
+            p=DENDROGRAM_LEAVES,
+            color_threshold=selected_height)
+        ax.axhline(selected_height, color="#ff4b4b", linestyle="--", label=f"Cut for {n_clusters} clusters")
         ax.set_title("Hierarchical Clustering Dendrogram")
         ax.set_xlabel(label_column)
         ax.set_ylabel("Distance")
+        ax.legend()
         plt.tight_layout()
         st.pyplot(fig)
         st.caption(
             "The dendrogram shows how rows merge together from most similar to less similar. "
-            "Shorter branches mean observations joined earlier, while taller merges show larger differences between groups."
+            "Shorter branches mean observations joined earlier, while taller merges show larger differences between groups. "
+            "The dashed line is where the tree is cut to make the selected number of clusters."
         )
 
-        if len(X) > dendrogram_size:
-            st.caption("Showing a random sample of 50 rows in the dendrogram so the chart stays readable.")
+        if sample_rows is not None:
+            st.caption(
+                f"Showing the top {DENDROGRAM_LEAVES} branches of the tree built from {HIERARCHY_SAMPLE_ROWS:,} sampled "
+                "rows. Labels in parentheses count how many sampled rows are inside that branch.")
+        elif len(X) > DENDROGRAM_LEAVES:
+            st.caption(
+                f"Showing the top {DENDROGRAM_LEAVES} branches of the full tree so the chart stays readable. "
+                "Labels in parentheses count how many rows are inside that branch.")
     else:
         st.warning("Please select at least 2 numeric features for Hierarchical Clustering.")
 
@@ -435,7 +1203,7 @@ if method == "PCA":
 
     if len(selected_features) >= 2:
         # PCA can create at most one component per selected feature, capped here for readability.
-        max_components = min(10, len(selected_features))
+        max_components = min(PCA_MAX_COMPONENTS, len(selected_features))
         n_components = st.slider(
             "Number of PCA components",
             min_value=2,
@@ -457,17 +1225,19 @@ if method == "PCA":
             X_for_pca = X
 
         X_array = np.asarray(X_for_pca)
+        data_key = make_data_key(X_array, selected_features, scale_data)
 
         st.subheader("Step 3: View PCA Results")
 
-        pca = PCA(n_components=n_components)
-        X_pca = pca.fit_transform(X_array)
+        # The cached decomposition already has every component the slider allows, so moving it never refits.
+        pca, X_pca, pca_engine, pca_seconds = cached_pca(X_array, data_key)
+        n_components = min(n_components, X_pca.shape[1])
 
         # Store PCA output in a dataframe so it can be displayed and plotted.
         pca_columns = [f"PC{i + 1}" for i in range(n_components)]
-        pca_df = pd.DataFrame(X_pca, columns=pca_columns, index=X.index)
+        pca_df = pd.DataFrame(X_pca[:, :n_components], columns=pca_columns, index=X.index)
 
-        explained_variance = pca.explained_variance_ratio_
+        explained_variance = pca.explained_variance_ratio_[:n_components]
         variance_df = pd.DataFrame({
             "Principal Component": pca_columns,
             "Explained Variance Ratio": explained_variance,
@@ -480,6 +1250,27 @@ if method == "PCA":
             "This bar chart shows how much of the dataset's variation each principal component captures. "
             "Taller bars mean that component keeps more information from the original features."
         )
+        st.caption(
+            f"Computed with the {pca_engine} solver in {pca_seconds:.2f} s, chosen automatically for "
+            f"{len(X):,} rows and {len(selected_features)} features.")
+
+        # Full SVD is the reference; the other engines can be checked against it.
+        if pca_engine != "Full SVD":
+            compare_exact = st.toggle(
+                "Compare with the exact full SVD",
+                value=pca_engine != "Incremental" and len(X) <= COMPARE_MAX_ROWS,
+                help="Full SVD copies the data several times, so it can be slow and use a lot of memory on large datasets.")
+            if compare_exact:
+                exact_pca, _, _, exact_seconds = cached_pca(X_array, data_key, "Full SVD")
+                accuracy_df = pd.DataFrame({
+                    "Principal Component": pca_columns,
+                    pca_engine: explained_variance,
+                    "Full SVD": exact_pca.explained_variance_ratio_[:n_components]})
+                accuracy_df["Difference"] = accuracy_df[pca_engine] - accuracy_df["Full SVD"]
+                st.dataframe(accuracy_df.style.format({"Difference": "{:.2e}"}))
+                st.caption(
+                    f"The largest explained variance difference is {accuracy_df['Difference'].abs().max():.2e}. "
+                    f"Full SVD took {exact_seconds:.2f} s, compared with {pca_seconds:.2f} s for the {pca_engine} solver.")
 
         st.subheader("PCA Scatter Plot")
 